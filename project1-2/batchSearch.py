@@ -0,0 +1,113 @@
+# batchSearch.py
+# --------------
+# Licensing Information:  You are free to use or extend these projects for
+# educational purposes provided that (1) you do not distribute or publish
+# solutions, (2) you retain this notice, and (3) you provide clear
+# attribution to UC Berkeley, including a link to http://ai.berkeley.edu.
+# 
+# Attribution Information: The Pacman AI projects were developed at UC Berkeley.
+# The core projects and autograders were primarily created by John DeNero
+# (denero@cs.berkeley.edu) and Dan Klein (klein@cs.berkeley.edu).
+# Student side autograding was added by Brad Miller, Nick Hay, and
+# Pieter Abbeel (pabbeel@cs.berkeley.edu).
+
+
+"""
+Solves many search problems on one layout in parallel.
+
+Every problem in a batch shares the same layout, so the layout is parsed
+once and handed to each worker process when the pool starts; with the fork
+start method the workers simply inherit it.  After that only the small
+problem specs and the resulting plans cross process boundaries.
+
+Example:
+
+    import layout, batchSearch
+    specs = [{'start': (5, 5), 'goal': (1, 1)},
+             {'problem': 'CornersProblem', 'start': (3, 1)}]
+    results = batchSearch.solveBatch(layout.getLayout('mediumMaze'), specs, fn='ucs')
+    print(results[0]['actions'], results[0]['stats']['expanded'])
+"""
+
+import multiprocessing
+
+import game
+import pacman
+import search
+import searchAgents
+
+# Per-worker state, filled in by _initWorker.
+_gameState = None
+_searchFunction = None
+_heuristic = None
+
+def getSearchFunction(fn, heuristic):
+    """
+    Looks up a search function and heuristic by name, the same way
+    SearchAgent does.  Returns (function, heuristic), where heuristic is None
+    if the function does not take one.
+    """
+    if fn not in dir(search):
+        raise AttributeError(fn + ' is not a search function in search.py.')
+    func = getattr(search, fn)
+    if 'heuristic' not in func.__code__.co_varnames:
+        return func, None
+    if heuristic in dir(searchAgents):
+        return func, getattr(searchAgents, heuristic)
+    if heuristic in dir(search):
+        return func, getattr(search, heuristic)
+    raise AttributeError(heuristic + ' is not a function in searchAgents.py or search.py.')
+
+def makeProblem(gameState, spec):
+    """
+    Builds the search problem a spec describes.  A spec is a dict with
+      'problem': a problem class name in searchAgents.py (default
+                 PositionSearchProblem)
+      'start':   Pacman's starting position (default: the layout's)
+      'goal':    the goal position, for PositionSearchProblem only
+    """
+    problemName = spec.get('problem', 'PositionSearchProblem')
+    start = spec.get('start')
+    if problemName == 'PositionSearchProblem':
+        return searchAgents.PositionSearchProblem(gameState, goal=spec.get('goal', (1, 1)), start=start,
+                                                  warn=False, visualize=False)
+    if start is not None:
+        gameState = gameState.deepCopy()
+        gameState.data.agentStates[0].configuration = game.Configuration(start, game.Directions.STOP)
+    return getattr(searchAgents, problemName)(gameState)
+
+def solve(gameState, spec, searchFunction, heuristic=None):
+    "Solves one spec and returns its plan, cost and SearchStats as a dict."
+    problem = makeProblem(gameState, spec)
+    actions, stats = search.instrumentedSearch(searchFunction, problem, heuristic)
+    return {'actions': actions, 'cost': problem.getCostOfActions(actions), 'stats': stats.asDict()}
+
+def _initWorker(layout, searchFunction, heuristic):
+    global _gameState, _searchFunction, _heuristic
+    _gameState = pacman.GameState()
+    _gameState.initialize(layout, 0)
+    _searchFunction = searchFunction
+    _heuristic = heuristic
+
+def _solveInWorker(spec):
+    return solve(_gameState, spec, _searchFunction, _heuristic)
+
+def solveBatch(layout, specs, fn='breadthFirstSearch', heuristic='nullHeuristic', processes=None):
+    """
+    Solves every spec in specs (see makeProblem) on layout with the search
+    function named fn, spreading them over a pool of processes (by default
+    one per CPU).  Returns one result dict per spec, in order, each holding
+    the plan as 'actions', its 'cost' and the search 'stats'.  With
+    processes=1 everything runs in this process, which is easier to debug.
+    """
+    searchFunction, heuristic = getSearchFunction(fn, heuristic)
+    if processes == 1:
+        _initWorker(layout, searchFunction, heuristic)
+        return [_solveInWorker(spec) for spec in specs]
+
+    if processes is None:
+        processes = multiprocessing.cpu_count()
+    # Large chunks keep the per-task messaging small next to the searches.
+    chunksize = max(1, len(specs) // (4 * processes))
+    with multiprocessing.Pool(processes, _initWorker, (layout, searchFunction, heuristic)) as pool:
+        return pool.map(_solveInWorker, specs, chunksize)
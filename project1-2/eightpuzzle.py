@@ -13,7 +13,13 @@
 
 
 import search
+import util
 import random
+import os
+import collections
+import math
+import struct
+import zlib
 
 # Module Classes
 
@@ -25,6 +31,9 @@ class EightPuzzleState:
     This class defines the mechanics of the puzzle itself.  The
     task of recasting this puzzle as a search problem is left to
     the EightPuzzleSearchProblem class.
+
+    The same class also handles larger sliding puzzles such as the
+    15-puzzle; the side length is taken from the number of tiles.
     """
 
     def __init__( self, numbers ):
@@ -46,18 +55,27 @@ class EightPuzzleState:
             | 6 | 7 | 8 |
             ------------
 
-        The configuration of the puzzle is stored in a 2-dimensional
-        list (a list of lists) 'cells'.
+        A list of 16 numbers from 0 to 15 gives a 15-puzzle, and so on.
+
+        The configuration is packed into a single int 'packed', four bits
+        per cell in row-major order, so copying, comparing and hashing a
+        state are all O(1).  'cells' rebuilds the 2-dimensional list view.
         """
-        self.cells = []
-        numbers = numbers[:] # Make a copy so as not to cause side-effects.
-        numbers.reverse()
-        for row in range( 3 ):
-            self.cells.append( [] )
-            for col in range( 3 ):
-                self.cells[row].append( numbers.pop() )
-                if self.cells[row][col] == 0:
-                    self.blankLocation = row, col
+        self.size = int(round(len(numbers) ** 0.5))
+        assert self.size * self.size == len(numbers) <= 16, 'not a square puzzle of at most 16 cells'
+        self.packed = 0
+        for index, number in enumerate(numbers):
+            self.packed |= number << (4 * index)
+        self.blank = numbers.index(0)
+
+    @property
+    def cells(self):
+        return [[(self.packed >> (4 * (row * self.size + col))) & 15 for col in range(self.size)]
+                for row in range(self.size)]
+
+    @property
+    def blankLocation(self):
+        return divmod(self.blank, self.size)
 
     def isGoal( self ):
         """
@@ -77,13 +95,7 @@ class EightPuzzleState:
         >>> EightPuzzleState([1, 0, 2, 3, 4, 5, 6, 7, 8]).isGoal()
         False
         """
-        current = 0
-        for row in range( 3 ):
-            for col in range( 3 ):
-                if current != self.cells[row][col]:
-                    return False
-                current += 1
-        return True
+        return self.packed == goalPacking(self.size)
 
     def legalMoves( self ):
         """
@@ -96,14 +108,14 @@ class EightPuzzleState:
         ['down', 'right']
         """
         moves = []
-        row, col = self.blankLocation
+        row, col = divmod(self.blank, self.size)
         if(row != 0):
             moves.append('up')
-        if(row != 2):
+        if(row != self.size - 1):
             moves.append('down')
         if(col != 0):
             moves.append('left')
-        if(col != 2):
+        if(col != self.size - 1):
             moves.append('right')
         return moves
 
@@ -119,30 +131,23 @@ class EightPuzzleState:
         NOTE: This function *does not* change the current object.  Instead,
         it returns a new object.
         """
-        row, col = self.blankLocation
         if(move == 'up'):
-            newrow = row - 1
-            newcol = col
+            target = self.blank - self.size
         elif(move == 'down'):
-            newrow = row + 1
-            newcol = col
+            target = self.blank + self.size
         elif(move == 'left'):
-            newrow = row
-            newcol = col - 1
+            target = self.blank - 1
         elif(move == 'right'):
-            newrow = row
-            newcol = col + 1
+            target = self.blank + 1
         else:
-            raise "Illegal Move"
-
-        # Create a copy of the current eightPuzzle
-        newPuzzle = EightPuzzleState([0, 0, 0, 0, 0, 0, 0, 0, 0])
-        newPuzzle.cells = [values[:] for values in self.cells]
-        # And update it to reflect the move
-        newPuzzle.cells[row][col] = self.cells[newrow][newcol]
-        newPuzzle.cells[newrow][newcol] = self.cells[row][col]
-        newPuzzle.blankLocation = newrow, newcol
-
+            raise Exception("Illegal Move")
+
+        # The tile at 'target' slides into the blank, whose nibble is zero.
+        tile = (self.packed >> (4 * target)) & 15
+        newPuzzle = EightPuzzleState.__new__(EightPuzzleState)
+        newPuzzle.size = self.size
+        newPuzzle.packed = self.packed ^ (tile << (4 * target)) | (tile << (4 * self.blank))
+        newPuzzle.blank = target
         return newPuzzle
 
     # Utilities for comparison and display
@@ -155,27 +160,25 @@ class EightPuzzleState:
               EightPuzzleState([1, 0, 2, 3, 4, 5, 6, 7, 8]).result('left')
           True
         """
-        for row in range( 3 ):
-            if self.cells[row] != other.cells[row]:
-                return False
-        return True
+        return self.packed == other.packed and self.size == other.size
 
     def __hash__(self):
-        return hash(str(self.cells))
+        return hash(self.packed)
 
     def __getAsciiString(self):
         """
           Returns a display string for the maze
         """
+        width = len(str(self.size * self.size - 1))
         lines = []
-        horizontalLine = ('-' * (13))
+        horizontalLine = ('-' * ((width + 3) * self.size + 1))
         lines.append(horizontalLine)
         for row in self.cells:
             rowLine = '|'
             for col in row:
                 if col == 0:
                     col = ' '
-                rowLine = rowLine + ' ' + col.__str__() + ' |'
+                rowLine = rowLine + ' ' + col.__str__().rjust(width) + ' |'
             lines.append(rowLine)
             lines.append(horizontalLine)
         return '\n'.join(lines)
@@ -183,6 +186,17 @@ class EightPuzzleState:
     def __str__(self):
         return self.__getAsciiString()
 
+_goalPackings = {}
+
+def goalPacking(size):
+    "The packed form of the solved puzzle: blank first, then tiles in order."
+    if size not in _goalPackings:
+        packed = 0
+        for number in range(size * size):
+            packed |= number << (4 * number)
+        _goalPackings[size] = packed
+    return _goalPackings[size]
+
 # TODO: Implement The methods in this class
 
 class EightPuzzleSearchProblem(search.SearchProblem):
@@ -196,7 +210,7 @@ class EightPuzzleSearchProblem(search.SearchProblem):
         self.puzzle = puzzle
 
     def getStartState(self):
-        return puzzle
+        return self.puzzle
 
     def isGoalState(self,state):
         return state.isGoal()
@@ -221,6 +235,127 @@ class EightPuzzleSearchProblem(search.SearchProblem):
         """
         return len(actions)
 
+PATTERN_DATABASE_DIR = util.getCacheDirectory('pacman_pattern_databases')
+
+# Pattern database file: a header giving the format version, the puzzle size,
+# the group size and a CRC-32 of the table, then the table itself.  Files
+# with another version, a wrong length or a bad checksum are rebuilt.
+PATTERN_DATABASE_MAGIC = b'PPDB'
+PATTERN_DATABASE_VERSION = 2
+PATTERN_DATABASE_HEADER = struct.Struct('<4sHBBI')
+
+# Disjoint groups of tiles for the additive pattern database, by side length.
+PATTERN_GROUPS = {
+    3: ((1, 2, 3, 4), (5, 6, 7, 8)),
+    4: ((1, 2, 3, 4), (5, 6, 7, 8), (9, 10, 11, 12), (13, 14, 15)),
+}
+
+class PatternDatabase:
+    """
+    An additive pattern database for sliding puzzles of one size.
+
+    For each group of tiles it stores, for every placement of just those
+    tiles, how many moves of those tiles it takes to bring them home; moves
+    of other tiles are free.  The groups are disjoint, so the sum over all
+    groups never counts a move twice and is an admissible, consistent
+    heuristic.  Tables are built by a 0-1 breadth first search backwards
+    from the goal and cached on disk, so only the first use pays for them.
+    """
+    def __init__(self, size, groups=None):
+        self.size = size
+        self.cells = size * size
+        self.groups = groups if groups is not None else PATTERN_GROUPS[size]
+        self.tables = [self._loadOrBuild(group) for group in self.groups]
+
+    def _loadOrBuild(self, group):
+        path = os.path.join(PATTERN_DATABASE_DIR, '%d-%s.pdb' % (self.size, '-'.join(map(str, group))))
+        try:
+            with open(path, 'rb') as f:
+                table = self._checkFile(f.read(), group)
+            if table is not None:
+                return table
+        except OSError:
+            pass
+        table = self._build(group)
+        util.writeCacheFile(path, PATTERN_DATABASE_HEADER.pack(
+            PATTERN_DATABASE_MAGIC, PATTERN_DATABASE_VERSION, self.size, len(group), zlib.crc32(table)) + table)
+        return table
+
+    def _checkFile(self, contents, group):
+        "The table stored in contents, or None if it is not a valid table for group."
+        if len(contents) != PATTERN_DATABASE_HEADER.size + self.cells ** len(group):
+            return None
+        magic, version, size, groupSize, checksum = PATTERN_DATABASE_HEADER.unpack_from(contents, 0)
+        table = contents[PATTERN_DATABASE_HEADER.size:]
+        if (magic, version, size, groupSize) != (PATTERN_DATABASE_MAGIC, PATTERN_DATABASE_VERSION,
+                                                 self.size, len(group)) or zlib.crc32(table) != checksum:
+            return None
+        return table
+
+    def _build(self, group):
+        size, cells = self.size, self.cells
+        neighbors = []
+        for cell in range(cells):
+            row, col = divmod(cell, size)
+            neighbors.append([r * size + c for r, c in ((row - 1, col), (row + 1, col), (row, col - 1), (row, col + 1))
+                              if 0 <= r < size and 0 <= c < size])
+
+        # Abstract states are (blank, tile positions); only moving a tile of
+        # the group costs anything.
+        start = (0, tuple(group))
+        seen = {start: 0}
+        frontier = collections.deque([start])
+        while frontier:
+            state = frontier.popleft()
+            blank, positions = state
+            cost = seen[state]
+            for cell in neighbors[blank]:
+                if cell in positions:
+                    moved = tuple(blank if p == cell else p for p in positions)
+                    nextState, nextCost = (cell, moved), cost + 1
+                else:
+                    nextState, nextCost = (cell, positions), cost
+                if nextCost < seen.get(nextState, 255):
+                    seen[nextState] = nextCost
+                    if nextCost == cost:
+                        frontier.appendleft(nextState)
+                    else:
+                        frontier.append(nextState)
+
+        # A placement's cost is the least over every blank position.  Slots
+        # that are not placements (two tiles on one cell) stay at 0xFF.
+        table = bytearray(b'\xff') * (cells ** len(group))
+        for (blank, positions), cost in seen.items():
+            index = self._index(positions)
+            table[index] = min(table[index], cost)
+        assert table.count(0xFF) == cells ** len(group) - math.perm(cells, len(group)), \
+            'pattern database for %s is missing placements' % (group,)
+        return bytes(table)
+
+    def _index(self, positions):
+        index = 0
+        for position in reversed(positions):
+            index = index * self.cells + position
+        return index
+
+    def getValue(self, state):
+        "Returns the heuristic value of an EightPuzzleState of this size."
+        positions = [0] * self.cells
+        packed = state.packed
+        for cell in range(self.cells):
+            positions[packed & 15] = cell
+            packed >>= 4
+        return sum(table[self._index([positions[tile] for tile in group])]
+                   for table, group in zip(self.tables, self.groups))
+
+_patternDatabases = {}
+
+def patternDatabaseHeuristic(state, problem=None):
+    "The additive pattern database heuristic for sliding puzzles."
+    if state.size not in _patternDatabases:
+        _patternDatabases[state.size] = PatternDatabase(state.size)
+    return _patternDatabases[state.size].getValue(state)
+
 EIGHT_PUZZLE_DATA = [[1, 0, 2, 3, 4, 5, 6, 7, 8],
                      [1, 7, 8, 2, 3, 4, 5, 6, 0],
                      [4, 3, 2, 7, 0, 5, 1, 6, 8],
@@ -248,15 +383,16 @@ def loadEightPuzzle(puzzleNumber):
     """
     return EightPuzzleState(EIGHT_PUZZLE_DATA[puzzleNumber])
 
-def createRandomEightPuzzle(moves=100):
+def createRandomEightPuzzle(moves=100, size=3):
     """
       moves: number of random moves to apply
+      size:  side length of the puzzle (4 for the 15-puzzle)
 
       Creates a random eight puzzle by applying
       a series of 'moves' random moves to a solved
       puzzle.
     """
-    puzzle = EightPuzzleState([0,1,2,3,4,5,6,7,8])
+    puzzle = EightPuzzleState(list(range(size * size)))
     for i in range(moves):
         # Execute a random legal move
         puzzle = puzzle.result(random.sample(puzzle.legalMoves(), 1)[0])
@@ -268,8 +404,8 @@ if __name__ == '__main__':
     print(puzzle)
 
     problem = EightPuzzleSearchProblem(puzzle)
-    path = search.breadthFirstSearch(problem)
-    print('BFS found a path of %d moves: %s' % (len(path), str(path)))
+    path = search.aStarSearch(problem, patternDatabaseHeuristic)
+    print('A* found a path of %d moves: %s' % (len(path), str(path)))
     curr = puzzle
     i = 1
     for a in path:
@@ -71,8 +71,28 @@ class GameState:
     # Accessor methods: use these to access state data #
     ####################################################
 
-    # static variable keeps track of which states have had getLegalActions called
+    # What generateSuccessor records about the states it touches, for the
+    # autograder: nothing (the default), how many successors were generated
+    # (exploredCount), or also every distinct parent and successor state
+    # (explored).  Recording states hashes each one and keeps it alive.
+    EXPLORE_NONE = 0
+    EXPLORE_COUNT = 1
+    EXPLORE_STATES = 2
+    exploreMode = EXPLORE_NONE
     explored = set()
+    exploredCount = 0
+    def setExploreMode(mode):
+        GameState.exploreMode = mode
+        GameState.explored = set()
+        GameState.exploredCount = 0
+    setExploreMode = staticmethod(setExploreMode)
+
+    def getAndResetExploredCount():
+        count = GameState.exploredCount
+        GameState.exploredCount = 0
+        return count
+    getAndResetExploredCount = staticmethod(getAndResetExploredCount)
+
     def getAndResetExplored():
         tmp = GameState.explored.copy()
         GameState.explored = set()
@@ -120,8 +140,11 @@ class GameState:
         # Book keeping
         state.data._agentMoved = agentIndex
         state.data.score += state.data.scoreChange
-        GameState.explored.add(self)
-        GameState.explored.add(state)
+        if GameState.exploreMode:
+            GameState.exploredCount += 1
+            if GameState.exploreMode == GameState.EXPLORE_STATES:
+                GameState.explored.add(self)
+                GameState.explored.add(state)
         return state
 
     def getLegalPacmanActions( self ):
@@ -523,6 +546,10 @@ def readCommand( argv ):
                       help='Turns on exception handling and timeouts during games', default=False)
     parser.add_option('--timeout', dest='timeout', type='int',
                       help=default('Maximum length of time an agent can spend computing in a single game'), default=30)
+    parser.add_option('--searchStats', dest='searchStats',
+                      help='Writes search statistics of a SearchAgent to this JSON FILE', metavar='FILE', default=None)
+    parser.add_option('--traceSearchMemory', action='store_true', dest='traceSearchMemory',
+                      help='With --searchStats, also measure peak search memory (slows the search down)', default=False)
 
     options, otherjunk = parser.parse_args(argv)
     if len(otherjunk) != 0:
@@ -544,6 +571,11 @@ def readCommand( argv ):
         args['numTraining'] = options.numTraining
         if 'numTraining' not in agentOpts: agentOpts['numTraining'] = options.numTraining
     pacman = pacmanType(**agentOpts) # Instantiate Pacman with agentArgs
+    if options.searchStats != None:
+        if not hasattr(pacman, 'searchStatsFile'):
+            raise Exception('--searchStats only works with search agents, not ' + options.pacman)
+        pacman.searchStatsFile = options.searchStats
+        pacman.traceSearchMemory = options.traceSearchMemory
     args['pacman'] = pacman
 
     # Don't display training games
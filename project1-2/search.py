@@ -17,6 +17,8 @@ In search.py, you will implement generic search algorithms which are called by
 Pacman agents (in searchAgents.py).
 """
 
+import heapq
+import time
 import util
 
 class SearchProblem:
@@ -72,6 +74,32 @@ def tinyMazeSearch(problem):
     w = Directions.WEST
     return  [s, s, w, s, w, w, s, w]
 
+class SearchNode:
+    """
+    A node in the search tree.  A node only remembers its state, the node it
+    was generated from, the action that got it here and the total cost of
+    the path so far, so pushing a node onto the fringe costs O(1) no matter
+    how deep it is.  The plan is rebuilt once, by following parent pointers,
+    when a goal node is popped.
+    """
+    __slots__ = ('state', 'parent', 'action', 'cost')
+
+    def __init__(self, state, parent=None, action=None, cost=0):
+        self.state = state
+        self.parent = parent
+        self.action = action
+        self.cost = cost
+
+    def getPath(self):
+        "Returns the list of actions that leads from the root to this node."
+        actions = []
+        node = self
+        while node.parent is not None:
+            actions.append(node.action)
+            node = node.parent
+        actions.reverse()
+        return actions
+
 def depthFirstSearch(problem: SearchProblem):
     """
     Search the deepest nodes in the search tree first.
@@ -88,76 +116,138 @@ def depthFirstSearch(problem: SearchProblem):
     """
     "*** YOUR CODE HERE ***"
 
-    StartState = problem.getStartState()
-    fringe = util.Stack()
-
-    fringe.push((StartState, []))
-
+    fringe = instrumentFringe(util.Stack(), problem)
+    fringe.push(SearchNode(problem.getStartState()))
     visited = set()
 
-    while fringe:
-        CurrState, actions = fringe.pop()
+    while not fringe.isEmpty():
+        node = fringe.pop()
 
-        if problem.isGoalState(CurrState):
-            return actions
+        if problem.isGoalState(node.state):
+            return node.getPath()
 
-        if CurrState not in visited:
-            visited.add(CurrState)
+        if node.state not in visited:
+            visited.add(node.state)
 
-            for successor, action, cost in problem.getSuccessors(CurrState):
+            for successor, action, cost in problem.getSuccessors(node.state):
                 if successor not in visited:
-                    fringe.push((successor, actions + [action]))
+                    fringe.push(SearchNode(successor, node, action))
     return []
-    util.raiseNotDefined()
 
 def breadthFirstSearch(problem: SearchProblem):
     """Search the shallowest nodes in the search tree first."""
     "*** YOUR CODE HERE ***"
-    StartState = problem.getStartState()
-    fringe = util.Queue()
 
-    fringe.push((StartState, []))
+    fringe = instrumentFringe(util.Queue(), problem)
+    fringe.push(SearchNode(problem.getStartState()))
     visited = set()
 
-    while fringe:
-        CurrState, actions = fringe.pop()
+    while not fringe.isEmpty():
+        node = fringe.pop()
 
-        if problem.isGoalState(CurrState):
-            return actions
+        if problem.isGoalState(node.state):
+            return node.getPath()
 
-        if CurrState not in visited:
-            visited.add(CurrState)
+        if node.state not in visited:
+            visited.add(node.state)
 
-            for successor, action, cost in problem.getSuccessors(CurrState):
+            for successor, action, cost in problem.getSuccessors(node.state):
                 if successor not in visited:
-                    fringe.push((successor, actions + [action]))
-
+                    fringe.push(SearchNode(successor, node, action))
     return []
-    util.raiseNotDefined()
 
 def uniformCostSearch(problem: SearchProblem):
     """Search the node of least total cost first."""
     "*** YOUR CODE HERE ***"
 
     StartState = problem.getStartState()
-    fringe = util.PriorityQueue()
-    fringe.push((StartState, []), 0)
+    # Maze costs are small integers, so a bucket queue gives O(1) push/pop;
+    # it falls back to a heap by itself if a cost or heuristic does not fit.
+    fringe = instrumentFringe(util.BucketPriorityQueue(), problem)
+    fringe.push(SearchNode(StartState), 0)
     visited = set()
-    while fringe:
-        CurrState, actions = fringe.pop()
+    best_cost = {StartState: 0}
 
-        if problem.isGoalState(CurrState):
-            return actions
+    while not fringe.isEmpty():
+        node = fringe.pop()
 
-        if CurrState not in visited:
-            visited.add(CurrState)
+        # A cheaper path to this state was pushed after this entry; skip it.
+        if node.cost > best_cost[node.state]:
+            continue
 
-            for successor, action, cost in problem.getSuccessors(CurrState):
-                if successor not in visited:
-                    new_cost = problem.getCostOfActions(actions + [action])
-                    fringe.push((successor, actions + [action]), new_cost)
+        if problem.isGoalState(node.state):
+            return node.getPath()
+
+        if node.state not in visited:
+            visited.add(node.state)
+
+            for successor, action, cost in problem.getSuccessors(node.state):
+                new_cost = node.cost + cost
+                if successor not in visited and new_cost < best_cost.get(successor, float('inf')):
+                    best_cost[successor] = new_cost
+                    fringe.push(SearchNode(successor, node, action, new_cost), new_cost)
     return []
-    util.raiseNotDefined()
+
+def bidirectionalSearch(problem: SearchProblem):
+    """
+    Uniform cost search run from the start and from the goal at the same
+    time, for problems with a single goal state.  Besides the usual methods
+    the problem must provide getGoalState() and getPredecessors(state), the
+    reverse of getSuccessors.  With unit step costs this is bidirectional
+    breadth first search.
+
+    Each side remembers the cost of the last node it expanded.  Once those two
+    costs add up to at least the cheapest start-to-goal path seen so far, no
+    unexpanded node can lead to a cheaper one and the search stops.
+    """
+    start = problem.getStartState()
+    if problem.isGoalState(start):
+        return []
+    goal = problem.getGoalState()
+
+    fringes = (instrumentFringe(util.BucketPriorityQueue(), problem),
+               instrumentFringe(util.BucketPriorityQueue(), problem))
+    best = ({start: SearchNode(start)}, {goal: SearchNode(goal)})
+    closed = (set(), set())
+    expandedCost = [0, 0]
+    expand = (problem.getSuccessors, problem.getPredecessors)
+    fringes[0].push(best[0][start], 0)
+    fringes[1].push(best[1][goal], 0)
+
+    meetCost, meeting = float('inf'), None
+    while not fringes[0].isEmpty() and not fringes[1].isEmpty():
+        # Grow whichever side is cheaper so the two searches stay balanced.
+        side = 0 if expandedCost[0] <= expandedCost[1] else 1
+        other = 1 - side
+        node = fringes[side].pop()
+        if node.state in closed[side] or node.cost > best[side][node.state].cost:
+            continue
+        if node.cost + expandedCost[other] >= meetCost:
+            break
+        expandedCost[side] = node.cost
+        closed[side].add(node.state)
+
+        for neighbor, action, cost in expand[side](node.state):
+            new_cost = node.cost + cost
+            known = best[side].get(neighbor)
+            if neighbor in closed[side] or (known is not None and known.cost <= new_cost):
+                continue
+            child = SearchNode(neighbor, node, action, new_cost)
+            best[side][neighbor] = child
+            fringes[side].push(child, new_cost)
+            if neighbor in best[other] and new_cost + best[other][neighbor].cost < meetCost:
+                meetCost = new_cost + best[other][neighbor].cost
+                meeting = (child, best[other][neighbor]) if side == 0 else (best[other][neighbor], child)
+
+    if meeting is None:
+        return []
+    # Backward nodes point towards the goal and hold the forward action.
+    actions = meeting[0].getPath()
+    node = meeting[1]
+    while node.parent is not None:
+        actions.append(node.action)
+        node = node.parent
+    return actions
 
 def nullHeuristic(state, problem=None):
     """
@@ -171,16 +261,18 @@ def aStarSearch(problem: SearchProblem, heuristic=nullHeuristic):
     "*** YOUR CODE HERE ***"
 
     StartState = problem.getStartState()
-    fringe = util.PriorityQueue()
-    fringe.push((StartState, []), 0)
+    # As in uniformCostSearch; integer heuristics keep f on the bucket path.
+    fringe = instrumentFringe(util.BucketPriorityQueue(), problem)
+    fringe.push(SearchNode(StartState), 0)
     visited = set()
     sum_cost = {StartState: 0}
 
-    while fringe:
-        CurrState, actions = fringe.pop()
+    while not fringe.isEmpty():
+        node = fringe.pop()
+        CurrState = node.state
 
         if problem.isGoalState(CurrState):
-            return actions
+            return node.getPath()
 
         if CurrState not in visited:
             visited.add(CurrState)
@@ -189,9 +281,488 @@ def aStarSearch(problem: SearchProblem, heuristic=nullHeuristic):
                 if successor not in visited or new_cost < sum_cost.get(successor, float('inf')):
                     sum_cost[successor] = new_cost
                     priority = new_cost + heuristic(successor, problem)
-                    fringe.push((successor, actions + [action]), priority)
+                    fringe.push(SearchNode(successor, node, action), priority)
+    return []
+
+
+def jumpPointSearch(problem: SearchProblem, heuristic=nullHeuristic):
+    """
+    A* with jump point pruning for single-goal problems on a 4-connected grid
+    where every step costs 1, such as PositionSearchProblem with the default
+    cost function.  The problem must provide walls (a game.Grid) and
+    getGoalState().
+
+    Instead of stepping to each neighbor, a move keeps going in a straight
+    line until it reaches the goal, a wall, or a cell where the line of
+    shortest paths could branch (a forced neighbor, or for vertical moves a
+    cell from which a horizontal jump finds one).  Only those jump points
+    enter the fringe, so open rooms cost a handful of expansions instead of
+    one per cell.  Each jump point expanded is counted through recordExpansion.
+
+    Jumps are only optimal when every step costs 1.  A problem with a costFn
+    that charges anything else for some open cell is handed to aStarSearch.
+    """
+    from game import Directions
+    walls = problem.walls
+    width, height = walls.width, walls.height
+    costFn = getattr(problem, 'costFn', None)
+    if costFn is not None and any(costFn((x, y)) != 1 for x in range(width) for y in range(height)
+                                  if not walls[x][y]):
+        return aStarSearch(problem, heuristic)
+    goal = problem.getGoalState()
+    start = problem.getStartState()
+    if problem.isGoalState(start):
+        return []
+
+    def isOpen(x, y):
+        return 0 <= x < width and 0 <= y < height and not walls[x][y]
+
+    def jumpHorizontal(x, y, dx):
+        while True:
+            x += dx
+            if not isOpen(x, y):
+                return None
+            if (x, y) == goal:
+                return (x, y)
+            if (isOpen(x, y - 1) and not isOpen(x - dx, y - 1)) or \
+               (isOpen(x, y + 1) and not isOpen(x - dx, y + 1)):
+                return (x, y)
+
+    def jumpVertical(x, y, dy):
+        while True:
+            y += dy
+            if not isOpen(x, y):
+                return None
+            if (x, y) == goal:
+                return (x, y)
+            if (isOpen(x - 1, y) and not isOpen(x - 1, y - dy)) or \
+               (isOpen(x + 1, y) and not isOpen(x + 1, y - dy)):
+                return (x, y)
+            if jumpHorizontal(x, y, 1) is not None or jumpHorizontal(x, y, -1) is not None:
+                return (x, y)
+
+    moves = {Directions.NORTH: (0, 1), Directions.SOUTH: (0, -1),
+             Directions.EAST: (1, 0), Directions.WEST: (-1, 0)}
+    # Directions worth trying after arriving by a given move; the start tries all.
+    pruned = {Directions.NORTH: (Directions.EAST, Directions.WEST, Directions.NORTH),
+              Directions.SOUTH: (Directions.EAST, Directions.WEST, Directions.SOUTH),
+              Directions.EAST: (Directions.NORTH, Directions.SOUTH, Directions.EAST),
+              Directions.WEST: (Directions.NORTH, Directions.SOUTH, Directions.WEST),
+              None: (Directions.NORTH, Directions.SOUTH, Directions.EAST, Directions.WEST)}
+
+    fringe = instrumentFringe(util.BucketPriorityQueue(), problem)
+    fringe.push(SearchNode(start), 0)
+    best_cost = {start: 0}
+    visited = set()
+    while not fringe.isEmpty():
+        node = fringe.pop()
+        if node.cost > best_cost[node.state] or node.state in visited:
+            continue
+        if node.state == goal:
+            # Unroll each jump back into single steps.
+            actions = []
+            while node.parent is not None:
+                actions.extend([node.action] * (node.cost - node.parent.cost))
+                node = node.parent
+            actions.reverse()
+            return actions
+        visited.add(node.state)
+
+        x, y = node.state
+        generated = 0
+        for action in pruned[node.action]:
+            dx, dy = moves[action]
+            if dx:
+                point = jumpHorizontal(x, y, dx)
+            else:
+                point = jumpVertical(x, y, dy)
+            if point is None or point in visited:
+                continue
+            generated += 1
+            new_cost = node.cost + abs(point[0] - x) + abs(point[1] - y)
+            if new_cost < best_cost.get(point, float('inf')):
+                best_cost[point] = new_cost
+                fringe.push(SearchNode(point, node, action, new_cost), new_cost + heuristic(point, problem))
+        recordExpansion(problem, generated)
+    return []
+
+def recordExpansion(problem, generated):
+    """
+    Counts one expansion for searches that generate nodes without calling
+    problem.getSuccessors.  An InstrumentedProblem records it in its
+    SearchStats and passes it on; a plain problem just has its _expanded
+    counter bumped, if it keeps one.
+    """
+    if isinstance(problem, InstrumentedProblem):
+        problem.recordExpansion(generated)
+    elif hasattr(problem, '_expanded'):
+        problem._expanded += 1
+
+def iterativeDeepeningAStarSearch(problem: SearchProblem, heuristic=nullHeuristic):
+    """
+    Iterative deepening A*: a depth first search that gives up on any node
+    whose f = g + h exceeds the current bound, restarted with the smallest f
+    that went over until a goal turns up.  Only the current path is kept in
+    memory, so it trades repeated expansions for memory proportional to the
+    solution depth.
+    """
+    start = problem.getStartState()
+    if problem.isGoalState(start):
+        return []
+
+    bound = heuristic(start, problem)
+    while True:
+        nextBound = float('inf')
+        nodes = [SearchNode(start)]
+        onPath = {start}
+        successors = [iter(problem.getSuccessors(start))]
+        while successors:
+            node = nodes[-1]
+            for successor, action, cost in successors[-1]:
+                if successor in onPath:
+                    continue
+                new_cost = node.cost + cost
+                f = new_cost + heuristic(successor, problem)
+                if f > bound:
+                    nextBound = min(nextBound, f)
+                    continue
+                child = SearchNode(successor, node, action, new_cost)
+                if problem.isGoalState(successor):
+                    return child.getPath()
+                nodes.append(child)
+                onPath.add(successor)
+                successors.append(iter(problem.getSuccessors(successor)))
+                break
+            else:
+                successors.pop()
+                onPath.discard(nodes.pop().state)
+        if nextBound == float('inf'):
+            return []
+        bound = nextBound
+
+# Default number of search nodes memoryBoundedAStarSearch may keep in memory.
+MEMORY_BOUNDED_NODE_LIMIT = 100000
+
+class MemoryBoundedNode(SearchNode):
+    """
+    A SearchNode that also remembers its f-value, its children still held in
+    memory and the lowest f among the children that had to be forgotten.
+    """
+    __slots__ = ('f', 'depth', 'children', 'forgotten', 'pruned')
+
+    def __init__(self, state, parent=None, action=None, cost=0, f=0):
+        SearchNode.__init__(self, state, parent, action, cost)
+        self.f = f
+        self.depth = 0 if parent is None else parent.depth + 1
+        self.children = []
+        self.forgotten = float('inf')
+        self.pruned = False
+
+    def isLeaf(self):
+        return not self.children
+
+def memoryBoundedAStarSearch(problem: SearchProblem, heuristic=nullHeuristic, maxNodes=None):
+    """
+    A* that never holds more than maxNodes search nodes (by default
+    MEMORY_BOUNDED_NODE_LIMIT), in the style of SMA*.
+
+    The search tree is kept explicitly.  When it grows past the budget, the
+    leaf with the highest f is dropped and its f is remembered by its parent.
+    A node with forgotten children competes for expansion at that remembered
+    f and, when chosen, regenerates the children it no longer holds.  All f
+    values stay lower bounds, so with a consistent heuristic the first goal
+    expanded is still optimal.  Returns [] if no solution fits in the budget.
+
+    Like iterativeDeepeningAStarSearch this is a tree search that only
+    avoids cycles along the current path, so open layouts with many equal
+    routes cost far more expansions than aStarSearch.
+
+    A budget that is too small does not make the search fail quickly.  It
+    gives up only once every path short enough to fit has been tried.  With
+    a weak heuristic that can mean regenerating the same subtrees an
+    exponential number of times, so the run time is effectively unbounded.
+    For example, nullHeuristic on tinyCorners with maxNodes of 10, 30 or 100
+    runs for minutes or more.  Keep maxNodes well above the solution depth,
+    or use an informative heuristic.
+    """
+    if maxNodes is None:
+        maxNodes = MEMORY_BOUNDED_NODE_LIMIT
+    start = problem.getStartState()
+    root = MemoryBoundedNode(start, f=heuristic(start, problem))
+    size = 1
+    # Heaps with lazily discarded stale entries: 'best' holds leaves keyed by
+    # f and internal nodes keyed by their forgotten f, 'worst' holds leaves.
+    best, worst = [], []
+    counter = 0
+
+    def key(node):
+        return node.f if node.isLeaf() else node.forgotten
+
+    def push(node):
+        nonlocal counter
+        counter += 1
+        heapq.heappush(best, (key(node), -node.depth, counter, node))
+        if node.isLeaf():
+            heapq.heappush(worst, (-node.f, node.depth, counter, node))
+
+    def backUp(node):
+        while node is not None and not node.isLeaf():
+            f = min([child.f for child in node.children] + [node.forgotten])
+            if f == node.f:
+                return
+            node.f = f
+            node = node.parent
+
+    def detach(leaf):
+        "Drops a leaf from the tree, turning its parent back into a leaf if it was the last child."
+        nonlocal size
+        parent = leaf.parent
+        parent.children.remove(leaf)
+        leaf.pruned = True
+        size -= 1
+        if parent.isLeaf():
+            parent.f = parent.forgotten
+            push(parent)
+            backUp(parent.parent)
+        else:
+            if parent.forgotten < float('inf'):
+                push(parent)
+            backUp(parent)
+
+    push(root)
+    while best:
+        f, _, _, node = heapq.heappop(best)
+        if node.pruned or key(node) != f:
+            continue
+        if f == float('inf'):
+            return []
+        if node.isLeaf() and problem.isGoalState(node.state):
+            return node.getPath()
+
+        # (Re)generate every child that is not in memory, skipping states
+        # already on the path back to the root.
+        skip = {child.state for child in node.children}
+        ancestor = node.parent
+        while ancestor is not None:
+            skip.add(ancestor.state)
+            ancestor = ancestor.parent
+        newChildren = []
+        for successor, action, cost in problem.getSuccessors(node.state):
+            if successor in skip:
+                continue
+            new_cost = node.cost + cost
+            if node.depth + 2 > maxNodes and not problem.isGoalState(successor):
+                # The path to anything below this child would not fit in memory.
+                child_f = float('inf')
+            else:
+                child_f = max(node.f, new_cost + heuristic(successor, problem))
+            newChildren.append(MemoryBoundedNode(successor, node, action, new_cost, child_f))
+        node.children.extend(newChildren)
+        node.forgotten = float('inf')
+        size += len(newChildren)
+
+        if node.isLeaf():
+            # Dead end: nothing below this node can reach a goal.
+            node.f = float('inf')
+            if node.parent is not None:
+                detach(node)
+            continue
+        for child in newChildren:
+            push(child)
+        backUp(node)
+
+        # The best new child is never dropped straight away, otherwise the
+        # node could keep regenerating and losing the same children.
+        keep = min(newChildren, key=lambda child: child.f)
+        kept = None
+        while size > maxNodes:
+            leaf = None
+            while worst:
+                entry = heapq.heappop(worst)
+                candidate = entry[3]
+                if candidate.pruned or not candidate.isLeaf() or candidate.f != -entry[0] \
+                        or candidate is root:
+                    continue
+                if candidate is keep:
+                    kept = entry
+                    continue
+                leaf = candidate
+                break
+            if leaf is None:
+                return []
+            leaf.parent.forgotten = min(leaf.parent.forgotten, leaf.f)
+            detach(leaf)
+        if kept is not None:
+            heapq.heappush(worst, kept)
+
+        if len(best) + len(worst) > 8 * maxNodes:
+            nodes, stack = [], [root]
+            while stack:
+                n = stack.pop()
+                nodes.append(n)
+                stack.extend(n.children)
+            best, worst = [], []
+            for n in nodes:
+                if n.isLeaf() or n.forgotten < float('inf'):
+                    push(n)
     return []
-    util.raiseNotDefined()
+
+class SearchStats:
+    """
+    Counters and timers filled in while a search runs on an
+    InstrumentedProblem.  Times are in seconds.  peakFrontier counts every
+    entry pushed and not yet popped, stale duplicates included, summed over
+    all fringes of the search.  peakMemory is the peak number of bytes
+    allocated during the search and is only measured when traceMemory is
+    set, because tracemalloc slows everything else down.  Searches that keep
+    no fringe object (IDA*, memory-bounded A*) leave peakFrontier at 0.
+    """
+    def __init__(self, traceMemory=False):
+        self.traceMemory = traceMemory
+        self.expanded = 0
+        self.generated = 0
+        self.heuristicCalls = 0
+        self.frontier = 0
+        self.peakFrontier = 0
+        self.peakMemory = None
+        self.totalTime = 0.0
+        self.successorTime = 0.0
+        self.heuristicTime = 0.0
+        self.queueTime = 0.0
+        self.pathLength = None
+
+    def asDict(self):
+        return {
+            'expanded': self.expanded,
+            'generated': self.generated,
+            'heuristicCalls': self.heuristicCalls,
+            'peakFrontier': self.peakFrontier,
+            'peakMemory': self.peakMemory,
+            'totalTime': self.totalTime,
+            'successorTime': self.successorTime,
+            'heuristicTime': self.heuristicTime,
+            'queueTime': self.queueTime,
+            'otherTime': self.totalTime - self.successorTime - self.heuristicTime - self.queueTime,
+            'pathLength': self.pathLength,
+        }
+
+class InstrumentedProblem:
+    """
+    Wraps a search problem and records successor generation in a SearchStats.
+    Everything else, including attributes heuristics look at such as walls or
+    heuristicInfo, is passed through to the wrapped problem.
+    """
+    def __init__(self, problem, stats):
+        self.problem = problem
+        self.searchStats = stats
+
+    def __getattr__(self, name):
+        return getattr(self.problem, name)
+
+    def getStartState(self):
+        return self.problem.getStartState()
+
+    def isGoalState(self, state):
+        return self.problem.isGoalState(state)
+
+    def getSuccessors(self, state):
+        start = time.perf_counter()
+        successors = self.problem.getSuccessors(state)
+        self.searchStats.successorTime += time.perf_counter() - start
+        self.searchStats.expanded += 1
+        self.searchStats.generated += len(successors)
+        return successors
+
+    def getPredecessors(self, state):
+        start = time.perf_counter()
+        predecessors = self.problem.getPredecessors(state)
+        self.searchStats.successorTime += time.perf_counter() - start
+        self.searchStats.expanded += 1
+        self.searchStats.generated += len(predecessors)
+        return predecessors
+
+    def getCostOfActions(self, actions):
+        return self.problem.getCostOfActions(actions)
+
+    def recordExpansion(self, generated):
+        "Counts an expansion made without getSuccessors, e.g. by jumpPointSearch."
+        self.searchStats.expanded += 1
+        self.searchStats.generated += generated
+        recordExpansion(self.problem, generated)
+
+class InstrumentedFringe:
+    "Wraps a Stack, Queue or priority queue and times every operation on it."
+    def __init__(self, fringe, stats):
+        self.fringe = fringe
+        self.stats = stats
+
+    def push(self, *args):
+        start = time.perf_counter()
+        self.fringe.push(*args)
+        self.stats.queueTime += time.perf_counter() - start
+        self.stats.frontier += 1
+        if self.stats.frontier > self.stats.peakFrontier:
+            self.stats.peakFrontier = self.stats.frontier
+
+    def pop(self):
+        start = time.perf_counter()
+        item = self.fringe.pop()
+        self.stats.queueTime += time.perf_counter() - start
+        self.stats.frontier -= 1
+        return item
+
+    def isEmpty(self):
+        return self.fringe.isEmpty()
+
+def instrumentFringe(fringe, problem):
+    """
+    Returns fringe, wrapped so it reports to the problem's SearchStats when
+    the problem is an InstrumentedProblem.  Plain problems get the fringe
+    back untouched, so uninstrumented searches pay nothing.
+    """
+    stats = getattr(problem, 'searchStats', None)
+    if stats is None:
+        return fringe
+    return InstrumentedFringe(fringe, stats)
+
+def instrumentHeuristic(heuristic, problem):
+    "Like instrumentFringe, but times calls to a heuristic."
+    stats = getattr(problem, 'searchStats', None)
+    if stats is None:
+        return heuristic
+    def timedHeuristic(state, problem):
+        start = time.perf_counter()
+        value = heuristic(state, problem)
+        stats.heuristicTime += time.perf_counter() - start
+        stats.heuristicCalls += 1
+        return value
+    return timedHeuristic
+
+def instrumentedSearch(searchFunction, problem, heuristic=None, traceMemory=False):
+    """
+    Runs searchFunction on problem and returns (actions, stats), where stats
+    is the SearchStats collected along the way.  If heuristic is given it is
+    passed on to searchFunction and timed as well.
+    """
+    stats = SearchStats(traceMemory)
+    wrapped = InstrumentedProblem(problem, stats)
+    if traceMemory:
+        import tracemalloc
+        tracemalloc.start()
+    start = time.perf_counter()
+    try:
+        if heuristic is None:
+            actions = searchFunction(wrapped)
+        else:
+            actions = searchFunction(wrapped, heuristic=instrumentHeuristic(heuristic, wrapped))
+    finally:
+        stats.totalTime = time.perf_counter() - start
+        if traceMemory:
+            stats.peakMemory = tracemalloc.get_traced_memory()[1]
+            tracemalloc.stop()
+    if actions is not None:
+        stats.pathLength = len(actions)
+    return actions, stats
 
 
 # Abbreviations
@@ -199,3 +770,7 @@ bfs = breadthFirstSearch
 dfs = depthFirstSearch
 astar = aStarSearch
 ucs = uniformCostSearch
+bds = bidirectionalSearch
+idastar = iterativeDeepeningAStarSearch
+smastar = memoryBoundedAStarSearch
+jps = jumpPointSearch
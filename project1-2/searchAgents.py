@@ -34,7 +34,7 @@ description for details.
 Good luck and happy searching!
 """
 
-from typing import List, Tuple, Any
+from typing import Tuple, Any
 from game import Directions
 from game import Agent
 from game import Actions
@@ -42,6 +42,13 @@ import util
 import time
 import search
 import pacman
+import os
+import json
+import array
+import collections
+import hashlib
+import struct
+import zlib
 
 class GoWestAgent(Agent):
     "An agent that goes West until it can't."
@@ -70,21 +77,37 @@ class SearchAgent(Agent):
     Options for fn include:
       depthFirstSearch or dfs
       breadthFirstSearch or bfs
+      bidirectionalSearch or bds (single-goal problems such as
+        PositionSearchProblem)
+      iterativeDeepeningAStarSearch or idastar
+      memoryBoundedAStarSearch or smastar (node budget set by the maxNodes
+        agent argument, search.MEMORY_BOUNDED_NODE_LIMIT by default)
+      jumpPointSearch or jps (unit-cost PositionSearchProblem)
 
 
     Note: You should NOT change any code in SearchAgent
     """
 
-    def __init__(self, fn='depthFirstSearch', prob='PositionSearchProblem', heuristic='nullHeuristic'):
+    # Set by pacman.py --searchStats: where to dump the SearchStats as JSON.
+    searchStatsFile = None
+    traceSearchMemory = False
+
+    def __init__(self, fn='depthFirstSearch', prob='PositionSearchProblem', heuristic='nullHeuristic',
+                 maxNodes=None):
         # Warning: some advanced Python magic is employed below to find the right functions and problems
 
         # Get the search function from the name and heuristic
         if fn not in dir(search):
             raise AttributeError(fn + ' is not a search function in search.py.')
         func = getattr(search, fn)
+        options = {}
+        if maxNodes is not None:
+            if 'maxNodes' not in func.__code__.co_varnames:
+                raise AttributeError(fn + ' does not take a maxNodes budget.')
+            options['maxNodes'] = int(maxNodes)
         if 'heuristic' not in func.__code__.co_varnames:
             print('[SearchAgent] using function ' + fn)
-            self.searchFunction = func
+            self.searchFunction = (lambda x: func(x, **options)) if options else func
         else:
             if heuristic in globals().keys():
                 heur = globals()[heuristic]
@@ -94,7 +117,7 @@ class SearchAgent(Agent):
                 raise AttributeError(heuristic + ' is not a function in searchAgents.py or search.py.')
             print('[SearchAgent] using function %s and heuristic %s' % (fn, heuristic))
             # Note: this bit of Python trickery combines the search algorithm and the heuristic
-            self.searchFunction = lambda x: func(x, heuristic=heur)
+            self.searchFunction = lambda x: func(x, heuristic=search.instrumentHeuristic(heur, x), **options)
 
         # Get the search problem type from the name
         if prob not in globals().keys() or not prob.endswith('Problem'):
@@ -114,7 +137,16 @@ class SearchAgent(Agent):
         if self.searchFunction == None: raise Exception("No search function provided for SearchAgent")
         starttime = time.time()
         problem = self.searchType(state) # Makes a new search problem
-        self.actions  = self.searchFunction(problem) # Find a path
+        if self.searchStatsFile == None:
+            self.actions  = self.searchFunction(problem) # Find a path
+        else:
+            self.actions, stats = search.instrumentedSearch(self.searchFunction, problem,
+                                                            traceMemory=self.traceSearchMemory)
+            record = {'agent': type(self).__name__, 'problem': type(problem).__name__}
+            record.update(stats.asDict())
+            with open(self.searchStatsFile, 'w') as f:
+                json.dump(record, f, indent=2)
+            print('Search stats written to %s' % self.searchStatsFile)
         if self.actions == None:
             self.actions = []
         totalCost = problem.getCostOfActions(self.actions)
@@ -214,6 +246,33 @@ class PositionSearchProblem(search.SearchProblem):
 
         return successors
 
+    def getGoalState(self):
+        return self.goal
+
+    def getPredecessors(self, state):
+        """
+        The reverse of getSuccessors, used by bidirectional search.  Returns
+        triples (predecessor, action, stepCost) where 'action' is the move
+        that takes 'predecessor' to 'state' and 'stepCost' is what that move
+        costs.
+        """
+        predecessors = []
+        x,y = state
+        cost = self.costFn(state)
+        for action in [Directions.NORTH, Directions.SOUTH, Directions.EAST, Directions.WEST]:
+            dx, dy = Actions.directionToVector(action)
+            prevx, prevy = int(x - dx), int(y - dy)
+            if not self.walls[prevx][prevy]:
+                predecessors.append( ( (prevx, prevy), action, cost) )
+
+        # Bookkeeping for display purposes
+        self._expanded += 1 # DO NOT CHANGE
+        if state not in self._visited:
+            self._visited[state] = True
+            self._visitedlist.append(state)
+
+        return predecessors
+
     def getCostOfActions(self, actions):
         """
         Returns the cost of a particular sequence of actions. If those actions
@@ -274,7 +333,8 @@ class CornersProblem(search.SearchProblem):
     """
     This search problem finds paths through all four corners of a layout.
 
-    You must select a suitable state space and successor function
+    A search state is a tuple ( pacmanPosition, visited ) where visited is a
+    4-bit mask; bit i is set once Pacman has stepped on self.corners[i].
     """
 
     def __init__(self, startingGameState: pacman.GameState):
@@ -285,10 +345,12 @@ class CornersProblem(search.SearchProblem):
         self.startingPosition = startingGameState.getPacmanPosition()
         top, right = self.walls.height-2, self.walls.width-2
         self.corners = ((1,1), (1,top), (right, 1), (right, top))
+        self.cornerBits = {corner: 1 << i for i, corner in enumerate(self.corners)}
         for corner in self.corners:
             if not startingGameState.hasFood(*corner):
                 print('Warning: no food in corner ' + str(corner))
         self._expanded = 0 # DO NOT CHANGE; Number of search nodes expanded
+        self.heuristicInfo = {} # A dictionary for the heuristic to store information
 
     def getStartState(self):
         """
@@ -296,7 +358,7 @@ class CornersProblem(search.SearchProblem):
         space)
         """
         "*** YOUR CODE HERE ***"
-        return (self.startingPosition, (False, False, False, False))
+        return (self.startingPosition, 0)
         util.raiseNotDefined()
 
     def isGoalState(self, state: Any):
@@ -305,7 +367,7 @@ class CornersProblem(search.SearchProblem):
         """
         "*** YOUR CODE HERE ***"
 
-        return all(state[1])
+        return state[1] == 0b1111
         util.raiseNotDefined()
 
     def getSuccessors(self, state: Any):
@@ -333,13 +395,8 @@ class CornersProblem(search.SearchProblem):
             nx, ny = int(x + dx), int(y + dy)
             if not self.walls[nx][ny]:
                 nextPosition = (nx, ny)
-                new_visited_corners = list(visited_corners)
-
-                if nextPosition in self.corners:
-                    corner_index = self.corners.index(nextPosition)
-                    new_visited_corners[corner_index] = True
-
-                successors.append(((nextPosition, tuple(new_visited_corners)), action, 1))
+                new_visited_corners = visited_corners | self.cornerBits.get(nextPosition, 0)
+                successors.append(((nextPosition, new_visited_corners), action, 1))
 
             "*** YOUR CODE HERE ***"
 
@@ -373,33 +430,64 @@ def cornersHeuristic(state: Any, problem: CornersProblem):
     shortest path from the state to a goal of the problem; i.e.  it should be
     admissible (as well as consistent).
     """
-    corners = problem.corners # These are the corner coordinates
-    walls = problem.walls # These are the walls of the maze, as a Grid (game.py)
-
     current_position, visited_corners = state
-
-    unvisited_corners = [corner for corner, visited in zip(corners, visited_corners) if not visited]
-
-    if not unvisited_corners:
+    if 'cornerTours' not in problem.heuristicInfo:
+        buildCornerTables(problem)
+    tours = problem.heuristicInfo['cornerTours']
+
+    # Corners inside a wall are left out, which keeps the bound admissible
+    # on such (unsolvable) layouts.
+    remaining = problem.heuristicInfo['openCorners'] & ~visited_corners
+    if not remaining:
         return 0
-    sum_distance = 0
-
-    while unvisited_corners:
-        distances = [util.manhattanDistance(current_position, corner) for corner in unvisited_corners]
-        min_distance = min(distances)
-        sum_distance += min_distance
-
-        closest_corner = unvisited_corners[distances.index(min_distance)]
-        current_position = closest_corner
-        unvisited_corners.remove(closest_corner)
-    return sum_distance
+    # Cells cut off from every open corner have no table entry; like the
+    # unreachable pairs in the table they count as 0.
+    toCorners = problem.heuristicInfo['cornerDistances'].get(current_position)
+    if toCorners is None:
+        return 0
+    # The exact remaining cost: walk to some remaining corner, then take the
+    # cheapest tour from it through the rest.
+    return min(toCorners[i] + tours[i][remaining & ~(1 << i)]
+               for i in range(4) if remaining & (1 << i))
     "*** YOUR CODE HERE ***"
 #    return 0 # Default to trivial solution
 
+def buildCornerTables(problem: CornersProblem):
+    """
+    Precomputes what cornersHeuristic looks up, in problem.heuristicInfo:
+      'openCorners':     mask of the corners that are not walls
+      'cornerDistances': cell -> tuple of maze distances to the four corners
+      'cornerTours':     cornerTours[i][mask] is the shortest walk that starts
+                         at corner i and visits every corner in mask
+    """
+    walls, corners = problem.walls, problem.corners
+    openCorners = [i for i, (x, y) in enumerate(corners) if not walls[x][y]]
+
+    # Four breadth first searches, one per corner, are all that is needed.
+    fromCorner = [distancesFrom(walls, corners[i]) if i in openCorners else {} for i in range(4)]
+    cornerDistances = {}
+    for cell in set().union(*fromCorner):
+        cornerDistances[cell] = tuple(fromCorner[i].get(cell, 0) for i in range(4))
+
+    # Removing a corner from a mask makes it smaller, so walking the masks in
+    # increasing order means every tour needed is already filled in.
+    tours = [[0] * 16 for _ in range(4)]
+    for mask in range(1, 16):
+        members = [j for j in openCorners if mask & (1 << j)]
+        if not members:
+            continue
+        for i in openCorners:
+            tours[i][mask] = min(cornerDistances[corners[i]][j] + tours[j][mask & ~(1 << j)]
+                                 for j in members)
+
+    problem.heuristicInfo['openCorners'] = sum(1 << i for i in openCorners)
+    problem.heuristicInfo['cornerDistances'] = cornerDistances
+    problem.heuristicInfo['cornerTours'] = tours
+
 class AStarCornersAgent(SearchAgent):
     "A SearchAgent for FoodSearchProblem using A* and your foodHeuristic"
     def __init__(self):
-        self.searchFunction = lambda prob: search.aStarSearch(prob, cornersHeuristic)
+        self.searchFunction = lambda prob: search.aStarSearch(prob, search.instrumentHeuristic(cornersHeuristic, prob))
         self.searchType = CornersProblem
 
 class FoodSearchProblem:
@@ -407,12 +495,19 @@ class FoodSearchProblem:
     A search problem associated with finding the a path that collects all of the
     food (dots) in a Pacman game.
 
-    A search state in this problem is a tuple ( pacmanPosition, foodGrid ) where
+    A search state in this problem is a tuple ( pacmanPosition, food ) where
       pacmanPosition: a tuple (x,y) of integers specifying Pacman's position
-      foodGrid:       a Grid (see game.py) of either True or False, specifying remaining food
+      food:           an int bitmask of the remaining food; bit i is set while
+                      the dot at foodCells[i] has not been eaten
+
+    The bitmask hashes and compares in a machine word or two, where a Grid
+    would be copied and walked cell by cell for every successor.  Use
+    getFoodPositions to turn it back into a list of coordinates.
     """
     def __init__(self, startingGameState: pacman.GameState):
-        self.start = (startingGameState.getPacmanPosition(), startingGameState.getFood())
+        self.foodCells = startingGameState.getFood().asList()
+        self.foodBits = {cell: 1 << i for i, cell in enumerate(self.foodCells)}
+        self.start = (startingGameState.getPacmanPosition(), (1 << len(self.foodCells)) - 1)
         self.walls = startingGameState.getWalls()
         self.startingGameState = startingGameState
         self._expanded = 0 # DO NOT CHANGE
@@ -422,7 +517,16 @@ class FoodSearchProblem:
         return self.start
 
     def isGoalState(self, state):
-        return state[1].count() == 0
+        return state[1] == 0
+
+    def getFoodPositions(self, food):
+        "Returns the (x,y) positions of the dots still set in a food bitmask."
+        positions = []
+        while food:
+            lowest = food & -food
+            positions.append(self.foodCells[lowest.bit_length() - 1])
+            food ^= lowest
+        return positions
 
     def getSuccessors(self, state):
         "Returns successor states, the actions they require, and a cost of 1."
@@ -433,8 +537,7 @@ class FoodSearchProblem:
             dx, dy = Actions.directionToVector(direction)
             nextx, nexty = int(x + dx), int(y + dy)
             if not self.walls[nextx][nexty]:
-                nextFood = state[1].copy()
-                nextFood[nextx][nexty] = False
+                nextFood = state[1] & ~self.foodBits.get((nextx, nexty), 0)
                 successors.append( ( ((nextx, nexty), nextFood), direction, 1) )
         return successors
 
@@ -455,10 +558,10 @@ class FoodSearchProblem:
 class AStarFoodSearchAgent(SearchAgent):
     "A SearchAgent for FoodSearchProblem using A* and your foodHeuristic"
     def __init__(self):
-        self.searchFunction = lambda prob: search.aStarSearch(prob, foodHeuristic)
+        self.searchFunction = lambda prob: search.aStarSearch(prob, search.instrumentHeuristic(foodHeuristic, prob))
         self.searchType = FoodSearchProblem
 
-def foodHeuristic(state: Tuple[Tuple, List[List]], problem: FoodSearchProblem):
+def foodHeuristic(state: Tuple[Tuple[int, int], int], problem: FoodSearchProblem):
     """
     Your heuristic for the FoodSearchProblem goes here.
 
@@ -471,8 +574,8 @@ def foodHeuristic(state: Tuple[Tuple, List[List]], problem: FoodSearchProblem):
     other hand, inadmissible or inconsistent heuristics may find optimal
     solutions, so be careful.
 
-    The state is a tuple ( pacmanPosition, foodGrid ) where foodGrid is a Grid
-    (see game.py) of either True or False. You can call foodGrid.asList() to get
+    The state is a tuple ( pacmanPosition, food ) where food is an int bitmask
+    over problem.foodCells. You can call problem.getFoodPositions(food) to get
     a list of food coordinates instead.
 
     If you want access to info like walls, capsules, etc., you can query the
@@ -486,26 +589,63 @@ def foodHeuristic(state: Tuple[Tuple, List[List]], problem: FoodSearchProblem):
     Subsequent calls to this heuristic can access
     problem.heuristicInfo['wallCount']
     """
-    position, foodGrid = state
+    position, food = state
     "*** YOUR CODE HERE ***"
 
-    foodList = foodGrid.asList()
+    foodList = problem.getFoodPositions(food)
     if not foodList:
         return 0
-    max_distance = max(util.manhattanDistance(position, food) for food in foodList)
-
-    if len(foodList) > 1:
-        food_distances = [util.manhattanDistance(foodA, foodB)
-                          for foodA in foodList
-                          for foodB in foodList if foodA != foodB]
-        max_food_distance = max(food_distances)
+    if 'mazeDistances' not in problem.heuristicInfo:
+        problem.heuristicInfo['mazeDistances'] = getMazeDistances(problem.walls)
+    getDistance = problem.heuristicInfo['mazeDistances'].getDistance
+    def distance(point1, point2):
+        # Unreachable pairs come back as -1; count them as 0, as mazeDistance
+        # does, so they cannot pull the bound below zero.
+        d = getDistance(point1, point2)
+        return d if d >= 0 else 0
+
+    # Pacman has to reach some dot and then connect all of them, so the
+    # nearest dot plus a minimum spanning tree over the dots is a lower bound.
+    # The tree only depends on the food left, which many A* nodes share.
+    if 'foodTrees' not in problem.heuristicInfo:
+        problem.heuristicInfo['foodTrees'] = collections.OrderedDict()
+    trees = problem.heuristicInfo['foodTrees']
+    if food in trees:
+        trees.move_to_end(food)
+        tree = trees[food]
     else:
-        max_food_distance = 0
+        tree = spanningTreeWeight(foodList, distance)
+        trees[food] = tree
+        if len(trees) > FOOD_TREE_CACHE_SIZE:
+            trees.popitem(last=False)
 
-    return max(max_distance, max_food_distance)
+    return min(distance(position, dot) for dot in foodList) + tree
 
 #    return 0
 
+# How many food sets foodHeuristic remembers spanning trees for.
+FOOD_TREE_CACHE_SIZE = 100000
+
+def spanningTreeWeight(points, distance):
+    "Weight of a minimum spanning tree over points, by Prim's algorithm."
+    if not points:
+        return 0
+    first, rest = points[0], points[1:]
+    nearest = [distance(first, point) for point in rest]
+    weight = 0
+    while rest:
+        i = nearest.index(min(nearest))
+        weight += nearest[i]
+        added = rest[i]
+        rest[i], nearest[i] = rest[-1], nearest[-1]
+        rest.pop()
+        nearest.pop()
+        for j, point in enumerate(rest):
+            d = distance(added, point)
+            if d < nearest[j]:
+                nearest[j] = d
+    return weight
+
 class ClosestDotSearchAgent(SearchAgent):
     "Search for all food using a sequence of searches"
     def registerInitialState(self, state):
@@ -584,11 +724,120 @@ def mazeDistance(point1: Tuple[int, int], point2: Tuple[int, int], gameState: pa
     Example usage: mazeDistance( (2,4), (5,6), gameState)
 
     This might be a useful helper function for your ApproximateSearchAgent.
+
+    Distances come from the layout's MazeDistances table.  The first call on
+    a layout builds it (one breadth first search from every open cell) unless
+    it is on disk already; later calls are lookups.  Points with no path
+    between them are 0 apart, as when this ran a single breadth first search.
     """
     x1, y1 = point1
     x2, y2 = point2
     walls = gameState.getWalls()
     assert not walls[x1][y1], 'point1 is a wall: ' + str(point1)
     assert not walls[x2][y2], 'point2 is a wall: ' + str(point2)
-    prob = PositionSearchProblem(gameState, start=point1, goal=point2, warn=False, visualize=False)
-    return len(search.bfs(prob))
+    distance = getMazeDistances(walls).getDistance(point1, point2)
+    return distance if distance >= 0 else 0
+
+MAZE_DISTANCE_CACHE_DIR = util.getCacheDirectory('pacman_maze_distances')
+
+# Maze distance file: a header giving the format version, the number of open
+# cells and a CRC-32 of the distances, then the int16 distances themselves.
+MAZE_DISTANCE_MAGIC = b'PMZD'
+MAZE_DISTANCE_VERSION = 1
+MAZE_DISTANCE_HEADER = struct.Struct('<4sHII')
+
+class MazeDistances:
+    """
+    Exact maze distances between every pair of open cells in a layout.
+
+    Cells are numbered through cellIndex and the distances live in one flat
+    int16 array, row-major by source cell, so a lookup is two dict hits and an
+    index.  Unreachable pairs are stored as -1.
+    """
+    def __init__(self, walls, distances=None):
+        self.cells = [(x, y) for x in range(walls.width) for y in range(walls.height)
+                      if not walls[x][y]]
+        self.cellIndex = {cell: i for i, cell in enumerate(self.cells)}
+        self.size = len(self.cells)
+        if distances is None:
+            distances = self._computeDistances(walls)
+        self.distances = distances
+
+    def _computeDistances(self, walls):
+        "Runs one breadth first search from every open cell."
+        size, cellIndex = self.size, self.cellIndex
+        neighbors = []
+        for x, y in self.cells:
+            neighbors.append([cellIndex[n] for n in ((x, y + 1), (x, y - 1), (x + 1, y), (x - 1, y))
+                              if n in cellIndex])
+        distances = array.array('h', [-1]) * (size * size)
+        for source in range(size):
+            row = source * size
+            distances[row + source] = 0
+            frontier = [source]
+            depth = 0
+            while frontier:
+                depth += 1
+                nextFrontier = []
+                for cell in frontier:
+                    for n in neighbors[cell]:
+                        if distances[row + n] < 0:
+                            distances[row + n] = depth
+                            nextFrontier.append(n)
+                frontier = nextFrontier
+        return distances
+
+    def getDistance(self, point1, point2):
+        return self.distances[self.cellIndex[point1] * self.size + self.cellIndex[point2]]
+
+def distancesFrom(walls, source):
+    "Returns a dict from every cell reachable from source to its maze distance."
+    distances = {source: 0}
+    frontier = [source]
+    depth = 0
+    while frontier:
+        depth += 1
+        nextFrontier = []
+        for x, y in frontier:
+            for cell in ((x, y + 1), (x, y - 1), (x + 1, y), (x - 1, y)):
+                if cell not in distances and not walls[cell[0]][cell[1]]:
+                    distances[cell] = depth
+                    nextFrontier.append(cell)
+        frontier = nextFrontier
+    return distances
+
+_mazeDistancesByLayout = {}
+
+def getMazeDistances(walls):
+    """
+    Returns the MazeDistances for a wall grid.  Tables are shared between all
+    problems on the same layout and kept on disk, keyed by a hash of the walls,
+    so each layout is only ever searched once.
+    """
+    key = hashlib.sha1(('%d,%d\n' % (walls.width, walls.height) + str(walls)).encode()).hexdigest()
+    if key in _mazeDistancesByLayout:
+        return _mazeDistancesByLayout[key]
+
+    path = os.path.join(MAZE_DISTANCE_CACHE_DIR, key + '.int16')
+    table = MazeDistances(walls, array.array('h'))
+    try:
+        with open(path, 'rb') as f:
+            contents = f.read()
+        magic, version, size, checksum = MAZE_DISTANCE_HEADER.unpack_from(contents, 0)
+        data = contents[MAZE_DISTANCE_HEADER.size:]
+        if (magic, version, size) == (MAZE_DISTANCE_MAGIC, MAZE_DISTANCE_VERSION, table.size) and \
+           len(data) == 2 * size * size and zlib.crc32(data) == checksum:
+            table.distances.frombytes(data)
+        else:
+            table = None
+    except (OSError, struct.error):
+        table = None
+
+    if table is None:
+        table = MazeDistances(walls)
+        data = table.distances.tobytes()
+        util.writeCacheFile(path, MAZE_DISTANCE_HEADER.pack(
+            MAZE_DISTANCE_MAGIC, MAZE_DISTANCE_VERSION, table.size, zlib.crc32(data)) + data)
+
+    _mazeDistancesByLayout[key] = table
+    return table
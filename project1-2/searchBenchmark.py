@@ -0,0 +1,231 @@
+# searchBenchmark.py
+# ------------------
+# Licensing Information:  You are free to use or extend these projects for
+# educational purposes provided that (1) you do not distribute or publish
+# solutions, (2) you retain this notice, and (3) you provide clear
+# attribution to UC Berkeley, including a link to http://ai.berkeley.edu.
+# 
+# Attribution Information: The Pacman AI projects were developed at UC Berkeley.
+# The core projects and autograders were primarily created by John DeNero
+# (denero@cs.berkeley.edu) and Dan Klein (klein@cs.berkeley.edu).
+# Student side autograding was added by Brad Miller, Nick Hay, and
+# Pieter Abbeel (pabbeel@cs.berkeley.edu).
+
+
+"""
+Benchmarks the search algorithms in search.py on the search problems in
+searchAgents.py over the layouts in layouts/, without any graphics.
+
+Every (layout, problem, algorithm) case runs in its own process, so one
+case cannot slow down the next, a case that runs too long can be killed,
+and peak RSS is measured per case.  For each case the harness records
+nodes expanded, wall time, nodes per second, path cost and peak RSS.
+
+Examples:
+
+> python searchBenchmark.py --output results.json
+> python searchBenchmark.py -l mediumMaze,bigMaze -a bfs,astar --baseline results.json
+
+With --baseline, results are compared to an earlier --output file.  A case
+counts as a regression if it now expands a different number of nodes,
+fails where it used to succeed, or drops more than --tolerance in nodes per
+second (speeds are only compared on cases that took at least
+MIN_TIMED_SECONDS in the baseline).  The exit status is 1 if there are any
+regressions.
+"""
+
+import os
+import sys
+import json
+import time
+import multiprocessing
+
+import layout
+import pacman
+import search
+import searchAgents
+
+LAYOUT_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'layouts')
+
+# Cases faster than this in the baseline are too noisy to compare speeds on.
+MIN_TIMED_SECONDS = 0.05
+
+# Algorithm name -> (search function, whether it takes a heuristic)
+ALGORITHMS = {
+    'dfs': (search.depthFirstSearch, False),
+    'bfs': (search.breadthFirstSearch, False),
+    'ucs': (search.uniformCostSearch, False),
+    'bds': (search.bidirectionalSearch, False),
+    'astar': (search.aStarSearch, True),
+    'idastar': (search.iterativeDeepeningAStarSearch, True),
+    'smastar': (search.memoryBoundedAStarSearch, True),
+    'jps': (search.jumpPointSearch, True),
+}
+
+# Problem class name -> heuristic the informed algorithms use on it
+PROBLEMS = {
+    'PositionSearchProblem': searchAgents.manhattanHeuristic,
+    'CornersProblem': searchAgents.cornersHeuristic,
+    'FoodSearchProblem': searchAgents.foodHeuristic,
+    'AnyFoodSearchProblem': search.nullHeuristic,
+}
+
+def allLayouts():
+    return sorted(name[:-len('.lay')] for name in os.listdir(LAYOUT_DIR) if name.endswith('.lay'))
+
+def makeProblem(problemName, gameState):
+    if problemName == 'PositionSearchProblem':
+        return searchAgents.PositionSearchProblem(gameState, warn=False, visualize=False)
+    return getattr(searchAgents, problemName)(gameState)
+
+def skipReason(layoutName, problemName, algorithmName):
+    "Returns why a case cannot run at all, or None if it can."
+    if algorithmName in ('bds', 'jps') and problemName != 'PositionSearchProblem':
+        return 'needs a single goal state'
+    if problemName == 'PositionSearchProblem':
+        lay = layout.tryToLoad(os.path.join(LAYOUT_DIR, layoutName + '.lay'))
+        if lay.walls[1][1]:
+            return 'goal (1,1) is a wall'
+    return None
+
+def runCase(layoutName, problemName, algorithmName, connection):
+    "Runs one case in a child process and sends its result dict back."
+    result = {}
+    try:
+        with open(os.devnull, 'w') as devnull:
+            stdout, sys.stdout = sys.stdout, devnull
+            try:
+                lay = layout.tryToLoad(os.path.join(LAYOUT_DIR, layoutName + '.lay'))
+                gameState = pacman.GameState()
+                gameState.initialize(lay, 0)
+                problem = makeProblem(problemName, gameState)
+                function, informed = ALGORITHMS[algorithmName]
+                start = time.perf_counter()
+                if informed:
+                    actions = function(problem, heuristic=PROBLEMS[problemName])
+                else:
+                    actions = function(problem)
+                elapsed = time.perf_counter() - start
+            finally:
+                sys.stdout = stdout
+        result['status'] = 'ok'
+        result['expanded'] = problem._expanded
+        result['time'] = elapsed
+        result['nodesPerSecond'] = problem._expanded / elapsed if elapsed > 0 else None
+        result['pathLength'] = len(actions)
+        result['pathCost'] = problem.getCostOfActions(actions)
+    except Exception as e:
+        result = {'status': 'error', 'error': '%s: %s' % (type(e).__name__, e)}
+    result['peakRSS'] = peakRSS()
+    connection.send(result)
+    connection.close()
+
+def peakRSS():
+    "Peak resident set size of this process in bytes, or None if unknown."
+    try:
+        import resource
+    except ImportError:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports kilobytes, macOS bytes.
+    return peak if sys.platform == 'darwin' else peak * 1024
+
+def benchmark(layoutName, problemName, algorithmName, timeout):
+    reason = skipReason(layoutName, problemName, algorithmName)
+    if reason is not None:
+        return {'status': 'skipped', 'reason': reason}
+    receiver, sender = multiprocessing.Pipe(duplex=False)
+    process = multiprocessing.Process(target=runCase,
+                                      args=(layoutName, problemName, algorithmName, sender))
+    process.start()
+    sender.close()
+    if receiver.poll(timeout):
+        try:
+            result = receiver.recv()
+        except EOFError:
+            result = {'status': 'error', 'error': 'benchmark process died'}
+    else:
+        process.terminate()
+        result = {'status': 'timeout'}
+    process.join()
+    return result
+
+def caseKey(layoutName, problemName, algorithmName):
+    return '%s/%s/%s' % (layoutName, problemName, algorithmName)
+
+def compare(results, baseline, tolerance):
+    "Returns a list of human readable regressions of results against baseline."
+    regressions = []
+    for key, old in sorted(baseline.items()):
+        new = results.get(key)
+        if new is None or old['status'] != 'ok':
+            continue
+        if new['status'] != 'ok':
+            regressions.append('%s: was ok, now %s' % (key, new['status']))
+            continue
+        if new['expanded'] != old['expanded']:
+            regressions.append('%s: expanded %d nodes, baseline %d' % (key, new['expanded'], old['expanded']))
+        if old['time'] >= MIN_TIMED_SECONDS and new['nodesPerSecond'] is not None \
+                and new['nodesPerSecond'] < (1 - tolerance) * old['nodesPerSecond']:
+            regressions.append('%s: %.0f nodes/s, baseline %.0f' % (key, new['nodesPerSecond'], old['nodesPerSecond']))
+    return regressions
+
+def formatResult(key, result):
+    if result['status'] == 'ok':
+        rss = result['peakRSS'] / 2 ** 20 if result['peakRSS'] is not None else float('nan')
+        return '%-60s %8d nodes %9.3fs %11.0f nodes/s %8.1f MB' % (
+            key, result['expanded'], result['time'], result['nodesPerSecond'] or 0, rss)
+    return '%-60s %s %s' % (key, result['status'], result.get('reason', result.get('error', '')))
+
+def readCommand(argv):
+    from optparse import OptionParser
+    parser = OptionParser(__doc__)
+    parser.add_option('-l', '--layouts', dest='layouts', default=None,
+                      help='Comma separated layout names (default: every layout in layouts/)')
+    parser.add_option('-p', '--problems', dest='problems', default=','.join(PROBLEMS),
+                      help='Comma separated problem classes [Default: %default]')
+    parser.add_option('-a', '--algorithms', dest='algorithms', default=','.join(ALGORITHMS),
+                      help='Comma separated algorithms [Default: %default]')
+    parser.add_option('-t', '--timeout', dest='timeout', type='float', default=10.0,
+                      help='Seconds before a case is killed [Default: %default]')
+    parser.add_option('-o', '--output', dest='output', default=None,
+                      help='Write the results as JSON to this FILE', metavar='FILE')
+    parser.add_option('-b', '--baseline', dest='baseline', default=None,
+                      help='Compare against the JSON results in this FILE', metavar='FILE')
+    parser.add_option('--tolerance', dest='tolerance', type='float', default=0.25,
+                      help='Allowed fractional drop in nodes per second [Default: %default]')
+    options, otherjunk = parser.parse_args(argv)
+    if len(otherjunk) != 0:
+        raise Exception('Command line input not understood: ' + str(otherjunk))
+    options.layouts = options.layouts.split(',') if options.layouts else allLayouts()
+    options.problems = options.problems.split(',')
+    options.algorithms = options.algorithms.split(',')
+    for name in options.problems:
+        if name not in PROBLEMS: raise Exception('Unknown problem class ' + name)
+    for name in options.algorithms:
+        if name not in ALGORITHMS: raise Exception('Unknown algorithm ' + name)
+    return options
+
+if __name__ == '__main__':
+    options = readCommand(sys.argv[1:])
+    results = {}
+    for layoutName in options.layouts:
+        for problemName in options.problems:
+            for algorithmName in options.algorithms:
+                key = caseKey(layoutName, problemName, algorithmName)
+                results[key] = benchmark(layoutName, problemName, algorithmName, options.timeout)
+                print(formatResult(key, results[key]))
+                sys.stdout.flush()
+
+    if options.output:
+        with open(options.output, 'w') as f:
+            json.dump(results, f, indent=2, sort_keys=True)
+
+    if options.baseline:
+        with open(options.baseline) as f:
+            baseline = json.load(f)
+        regressions = compare(results, baseline, options.tolerance)
+        for regression in regressions:
+            print('REGRESSION: ' + regression)
+        print('%d regression(s) against %s' % (len(regressions), options.baseline))
+        sys.exit(1 if regressions else 0)
@@ -0,0 +1,66 @@
+# test_eightpuzzle.py
+# -------------------
+# Licensing Information:  You are free to use or extend these projects for
+# educational purposes provided that (1) you do not distribute or publish
+# solutions, (2) you retain this notice, and (3) you provide clear
+# attribution to UC Berkeley, including a link to http://ai.berkeley.edu.
+#
+# Attribution Information: The Pacman AI projects were developed at UC Berkeley.
+# The core projects and autograders were primarily created by John DeNero
+# (denero@cs.berkeley.edu) and Dan Klein (klein@cs.berkeley.edu).
+# Student side autograding was added by Brad Miller, Nick Hay, and
+# Pieter Abbeel (pabbeel@cs.berkeley.edu).
+
+
+"""
+Checks the pattern database heuristic in eightpuzzle.py.
+
+Run with:  python -m unittest test_eightpuzzle
+"""
+
+import os
+import random
+import tempfile
+import unittest
+
+import eightpuzzle
+import search
+
+class PatternDatabaseTest(unittest.TestCase):
+
+    def setUp(self):
+        # Build into an empty directory so no earlier cache file is used.
+        self.tmp = tempfile.TemporaryDirectory()
+        self.savedDir = eightpuzzle.PATTERN_DATABASE_DIR
+        eightpuzzle.PATTERN_DATABASE_DIR = self.tmp.name
+        eightpuzzle._patternDatabases.clear()
+
+    def tearDown(self):
+        eightpuzzle.PATTERN_DATABASE_DIR = self.savedDir
+        eightpuzzle._patternDatabases.clear()
+        self.tmp.cleanup()
+
+    def testGoalIsZero(self):
+        goal = eightpuzzle.EightPuzzleState(list(range(9)))
+        self.assertEqual(eightpuzzle.patternDatabaseHeuristic(goal), 0)
+
+    def testMatchesBreadthFirstSearchCost(self):
+        random.seed(5804)
+        for _ in range(20):
+            puzzle = eightpuzzle.createRandomEightPuzzle(40)
+            problem = eightpuzzle.EightPuzzleSearchProblem(puzzle)
+            bfsCost = len(search.breadthFirstSearch(problem))
+            path = search.aStarSearch(problem, eightpuzzle.patternDatabaseHeuristic)
+            self.assertEqual(len(path), bfsCost)
+            self.assertLessEqual(eightpuzzle.patternDatabaseHeuristic(puzzle), bfsCost)
+
+    def testRebuildsBadCacheFiles(self):
+        built = eightpuzzle.PatternDatabase(3)
+        for name in os.listdir(self.tmp.name):
+            with open(os.path.join(self.tmp.name, name), 'r+b') as f:
+                f.seek(-1, os.SEEK_END)
+                f.write(b'\x00')
+        self.assertEqual(eightpuzzle.PatternDatabase(3).tables, built.tables)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,55 @@
+# test_searchStats.py
+# -------------------
+# Licensing Information:  You are free to use or extend these projects for
+# educational purposes provided that (1) you do not distribute or publish
+# solutions, (2) you retain this notice, and (3) you provide clear
+# attribution to UC Berkeley, including a link to http://ai.berkeley.edu.
+#
+# Attribution Information: The Pacman AI projects were developed at UC Berkeley.
+# The core projects and autograders were primarily created by John DeNero
+# (denero@cs.berkeley.edu) and Dan Klein (klein@cs.berkeley.edu).
+# Student side autograding was added by Brad Miller, Nick Hay, and
+# Pieter Abbeel (pabbeel@cs.berkeley.edu).
+
+
+"""
+Checks that pacman.py --searchStats reports the work a search did.
+
+Run with:  python -m unittest test_searchStats
+"""
+
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import unittest
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+def runSearchAgent(fn, layout='mediumMaze'):
+    "Runs pacman.py with --searchStats and returns (stdout, stats dict)."
+    with tempfile.TemporaryDirectory() as tmp:
+        statsFile = os.path.join(tmp, 'stats.json')
+        output = subprocess.run(
+            [sys.executable, 'pacman.py', '-p', 'SearchAgent', '-a', 'fn=' + fn,
+             '-l', layout, '-q', '--searchStats', statsFile],
+            cwd=HERE, capture_output=True, text=True, check=True).stdout
+        with open(statsFile) as f:
+            return output, json.load(f)
+
+class SearchStatsTest(unittest.TestCase):
+
+    def testJumpPointSearchCountsExpansions(self):
+        output, stats = runSearchAgent('jps')
+        self.assertGreater(stats['expanded'], 0)
+        self.assertGreater(stats['generated'], 0)
+        self.assertIn('Search nodes expanded: %d' % stats['expanded'], output)
+
+    def testBreadthFirstSearchCountsExpansions(self):
+        output, stats = runSearchAgent('bfs')
+        self.assertGreater(stats['expanded'], 0)
+        self.assertIn('Search nodes expanded: %d' % stats['expanded'], output)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,146 @@
+# evaluation.py
+# -------------
+# Licensing Information:  You are free to use or extend these projects for
+# educational purposes provided that (1) you do not distribute or publish
+# solutions, (2) you retain this notice, and (3) you provide clear
+# attribution to UC Berkeley, including a link to http://ai.berkeley.edu.
+# 
+# Attribution Information: The Pacman AI projects were developed at UC Berkeley.
+# The core projects and autograders were primarily created by John DeNero
+# (denero@cs.berkeley.edu) and Dan Klein (klein@cs.berkeley.edu).
+# Student side autograding was added by Brad Miller, Nick Hay, and
+# Pieter Abbeel (pabbeel@cs.berkeley.edu).
+
+
+"""
+Fast leaf evaluation for the searches in multiAgents.py.
+
+evaluate computes the same value as the loop-based betterEvaluationFunction
+used to, but looks up Pacman's distance to the nearest food in a
+DistanceField instead of measuring the distance to every dot.  A
+DistanceField is built once per layout.  For each cell Pacman visits it
+keeps an itemgetter over the food Grid's cells (see Grid.asBytes) that reads
+the open cells nearest first.  Finding the nearest food then takes one
+C-level pass and a tuple.index.
+
+evaluateStates evaluates many leaves at once.  Leaves of one search mostly
+differ only in where the ghosts are, and successors share their food Grid
+until a dot is eaten, so leaves with the same food Grid and Pacman cell
+share one nearest-food lookup and food count.
+"""
+
+import operator
+
+# Weights of the terms of evaluate.
+FOOD_DISTANCE_WEIGHT = -1.5
+CAPSULE_DISTANCE_WEIGHT = -2
+FOOD_LEFT_WEIGHT = -4
+CAPSULE_LEFT_WEIGHT = -20
+GHOST_WEIGHT = -10
+SCARED_GHOST_WEIGHT = 200
+
+class DistanceField:
+    """
+    Manhattan distances from the cells of one layout to its open cells, built
+    lazily for each cell asked about.
+    """
+
+    def __init__(self, walls):
+        self.height = walls.height
+        self.openCells = [(x, y) for x in range(walls.width) for y in range(walls.height)
+                          if not walls[x][y]]
+        self.rankings = {}
+
+    def getRanking(self, position):
+        """
+        Returns (getter, distances) for position.  getter(grid.asBytes())
+        gives the values of the open cells nearest first, and distances gives
+        the distance of each of those cells from position.
+        """
+        ranking = self.rankings.get(position)
+        if ranking is None:
+            x, y = position
+            cells = sorted(self.openCells, key=lambda cell: abs(cell[0] - x) + abs(cell[1] - y))
+            # The first cell is listed twice so that getter always returns a
+            # tuple, even on a layout with a single open cell.
+            cells.insert(0, cells[0])
+            getter = operator.itemgetter(*[cellX * self.height + cellY for cellX, cellY in cells])
+            distances = [abs(cellX - x) + abs(cellY - y) for cellX, cellY in cells]
+            ranking = self.rankings[position] = (getter, distances)
+        return ranking
+
+    def getClosestDistance(self, position, grid):
+        "Distance from position to the nearest true cell of grid, or 0 if none."
+        if not grid.count():
+            return 0
+        getter, distances = self.getRanking(position)
+        return distances[getter(grid.asBytes()).index(1)]
+
+# DistanceFields by walls.  Grids hash and compare by their cells, so every
+# copy of a layout shares one field.  The walls last asked about are kept
+# to skip hashing them again on the next leaf.
+_distanceFields = {}
+_lastWalls = _lastField = None
+
+def getDistanceField(walls):
+    global _lastWalls, _lastField
+    if walls is not _lastWalls:
+        field = _distanceFields.get(walls)
+        if field is None:
+            field = _distanceFields[walls] = DistanceField(walls)
+        _lastWalls, _lastField = walls, field
+    return _lastField
+
+def getFoodTerms(gameState):
+    "Returns the distance from Pacman to the nearest food and how much food is left."
+    pacmanPosition = gameState.getPacmanPosition()
+    food = gameState.getFood()
+    if pacmanPosition[0] == int(pacmanPosition[0]) and pacmanPosition[1] == int(pacmanPosition[1]):
+        field = getDistanceField(gameState.getWalls())
+        closestFoodDistance = field.getClosestDistance((int(pacmanPosition[0]), int(pacmanPosition[1])), food)
+    else:
+        closestFoodDistance = min([abs(x - pacmanPosition[0]) + abs(y - pacmanPosition[1])
+                                   for x, y in food.asList()] or [0])
+    return closestFoodDistance, food.count()
+
+def evaluate(gameState, foodTerms=None):
+    """
+    The score of gameState plus terms for the nearest food and capsule, the
+    food and capsules left, and the ghosts: scared ones are worth chasing,
+    others are worth keeping away from.  foodTerms, if given, is
+    getFoodTerms(gameState) computed already.
+    """
+    closestFoodDistance, foodLeft = foodTerms if foodTerms is not None else getFoodTerms(gameState)
+    pacmanPosition = gameState.getPacmanPosition()
+    capsules = gameState.getCapsules()
+    closestCapsuleDistance = min([abs(x - pacmanPosition[0]) + abs(y - pacmanPosition[1])
+                                  for x, y in capsules] or [0])
+
+    ghostScore = 0
+    scaredGhostScore = 0
+    for ghost in gameState.getGhostStates():
+        ghostX, ghostY = ghost.getPosition()
+        distance = abs(ghostX - pacmanPosition[0]) + abs(ghostY - pacmanPosition[1])
+        if ghost.scaredTimer > 0:
+            scaredGhostScore += SCARED_GHOST_WEIGHT / (distance + 1)
+        elif distance > 0:
+            ghostScore += GHOST_WEIGHT / distance
+
+    return (gameState.getScore() + FOOD_DISTANCE_WEIGHT * closestFoodDistance + ghostScore
+            + CAPSULE_DISTANCE_WEIGHT * closestCapsuleDistance + scaredGhostScore
+            + FOOD_LEFT_WEIGHT * foodLeft + CAPSULE_LEFT_WEIGHT * len(capsules))
+
+def evaluateStates(gameStates):
+    "Returns evaluate for each of gameStates, sharing the food terms between them."
+    # The states are held in a list for the whole call, so the ids of their
+    # food Grids cannot be reused by another Grid.
+    gameStates = list(gameStates)
+    foodTerms = {}
+    values = []
+    for gameState in gameStates:
+        key = (id(gameState.getFood()), gameState.getPacmanPosition())
+        terms = foodTerms.get(key)
+        if terms is None:
+            terms = foodTerms[key] = getFoodTerms(gameState)
+        values.append(evaluate(gameState, terms))
+    return values
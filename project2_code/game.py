@@ -24,6 +24,7 @@ from util import *
 import time
 import os
 import traceback
+import itertools
 import sys
 
 #######################
@@ -169,78 +170,116 @@ class AgentState:
         return self.configuration.getDirection()
 
 
+# Swaps the 0 and 1 bytes of a Grid's data.
+_INVERT_CELLS = bytes.maketrans(b'\x00\x01', b'\x01\x00')
+
 class Grid:
     """
-    A 2-dimensional array of objects backed by a list of lists.  Data is accessed
-    via grid[x][y] where (x,y) are positions on a Pacman map with x horizontal,
-    y vertical and the origin (0,0) in the bottom left corner.
+    A 2-dimensional array of booleans packed one byte per cell into a flat
+    bytearray, column after column.  Data is accessed via grid[x][y] where
+    (x,y) are positions on a Pacman map with x horizontal, y vertical and the
+    origin (0,0) in the bottom left corner.  grid[x] is a memoryview of
+    column x, so writes through it go straight to the grid.
 
     The __str__ method constructs an output that is oriented like a pacman board.
     """
 
+    CELLS_PER_INT = 30
+
     def __init__(self, width, height, initialValue=False, bitRepresentation=None):
         if initialValue not in [False, True]:
             raise Exception('Grids can only contain booleans')
-        self.CELLS_PER_INT = 30
-
         self.width = width
         self.height = height
-        self.data = [[initialValue for y in range(
-            height)] for x in range(width)]
+        self.data = bytearray([initialValue]) * (width * height)
+        self._view = None
+        self._columns = [None] * width
         if bitRepresentation:
             self._unpackBits(bitRepresentation)
 
     def __getitem__(self, i):
-        return self.data[i]
+        column = self._columns[i]
+        if column is None:
+            # Column views are made on first use, so copies that are never read cost one bytearray copy.
+            if self._view is None:
+                self._view = memoryview(self.data).cast('?')
+            if i < 0:
+                i += self.width
+            column = self._columns[i] = self._view[i * self.height:(i + 1) * self.height]
+        return column
 
     def __setitem__(self, key, item):
-        self.data[key] = item
+        column = self[key]
+        for y, value in enumerate(item):
+            column[y] = value
 
     def __str__(self):
-        out = [[str(self.data[x][y])[0] for x in range(self.width)]
+        out = [''.join('T' if self.data[x * self.height + y] else 'F' for x in range(self.width))
                for y in range(self.height)]
         out.reverse()
-        return '\n'.join([''.join(x) for x in out])
+        return '\n'.join(out)
 
     def __eq__(self, other):
-        if other == None:
+        if not isinstance(other, Grid):
             return False
-        return self.data == other.data
+        return self.height == other.height and self.data == other.data
 
     def __hash__(self):
-        # return hash(str(self))
-        base = 1
-        h = 0
-        for l in self.data:
-            for i in l:
-                if i:
-                    h += base
-                base *= 2
-        return hash(h)
+        return hash(bytes(self.data))
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        del state['_view'], state['_columns']
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        if isinstance(self.data, list):
+            # Games recorded before grids were packed stored lists of columns.
+            self.data = bytearray(bool(cell) for column in self.data for cell in column)
+        self._view = None
+        self._columns = [None] * self.width
 
     def copy(self):
-        g = Grid(self.width, self.height)
-        g.data = [x[:] for x in self.data]
+        g = Grid.__new__(Grid)
+        g.width = self.width
+        g.height = self.height
+        g.data = self.data[:]
+        g._view = None
+        g._columns = [None] * self.width
         return g
 
     def deepCopy(self):
         return self.copy()
 
     def shallowCopy(self):
-        g = Grid(self.width, self.height)
+        "A Grid that shares this one's cells, so changes to either show in both."
+        g = Grid.__new__(Grid)
+        g.width = self.width
+        g.height = self.height
         g.data = self.data
+        g._view = self._view
+        g._columns = self._columns
         return g
 
+    def asBytes(self):
+        """
+        The cells as a read-only bytes-like object, one column after another,
+        so cell (x, y) is at index x * height + y.
+        """
+        return memoryview(self.data).toreadonly()
+
+    def asArray(self):
+        "The cells as a read-only (width, height) memoryview of booleans."
+        return memoryview(self.data).toreadonly().cast('?', (self.width, self.height))
+
     def count(self, item=True):
-        return sum([x.count(item) for x in self.data])
+        return self.data.count(bool(item))
 
     def asList(self, key=True):
-        list = []
-        for x in range(self.width):
-            for y in range(self.height):
-                if self[x][y] == key:
-                    list.append((x, y))
-        return list
+        data = self.data if key else self.data.translate(_INVERT_CELLS)
+        height = self.height
+        return [divmod(i, height) for i in itertools.compress(range(len(data)), data)]
 
     def packBits(self):
         """
@@ -252,8 +291,7 @@ class Grid:
         currentInt = 0
         for i in range(self.height * self.width):
             bit = self.CELLS_PER_INT - (i % self.CELLS_PER_INT) - 1
-            x, y = self._cellIndexToPosition(i)
-            if self[x][y]:
+            if self.data[i]:
                 currentInt += 2 ** bit
             if (i + 1) % self.CELLS_PER_INT == 0:
                 bits.append(currentInt)
@@ -262,7 +300,7 @@ class Grid:
         return tuple(bits)
 
     def _cellIndexToPosition(self, index):
-        x = index / self.height
+        x = index // self.height
         y = index % self.height
         return x, y
 
@@ -275,8 +313,7 @@ class Grid:
             for bit in self._unpackInt(packed, self.CELLS_PER_INT):
                 if cell == self.width * self.height:
                     break
-                x, y = self._cellIndexToPosition(cell)
-                self[x][y] = bit
+                self.data[cell] = bit
                 cell += 1
 
     def _unpackInt(self, packed, size):
@@ -400,13 +437,17 @@ class GameStateData:
         Generates a new data packet by copying information from its predecessor.
         """
         if prevState != None:
-            self.food = prevState.food.shallowCopy()
-            self.capsules = prevState.capsules[:]
-            self.agentStates = self.copyAgentStates(prevState.agentStates)
+            # The food grid, capsule list and agent states are shared with the
+            # predecessor until they change; see getMutableAgentState.
+            self.food = prevState.food
+            self.capsules = prevState.capsules
+            self.agentStates = prevState.agentStates[:]
             self.layout = prevState.layout
             self._eaten = prevState._eaten
             self.score = prevState.score
 
+        self._copiedAgents = 0
+
         self._foodEaten = None
         self._foodAdded = None
         self._capsuleEaten = None
@@ -418,6 +459,8 @@ class GameStateData:
     def deepCopy(self):
         state = GameStateData(self)
         state.food = self.food.deepCopy()
+        state.capsules = self.capsules[:]
+        state.agentStates = self.copyAgentStates(self.agentStates)
         state.layout = self.layout.deepCopy()
         state._agentMoved = self._agentMoved
         state._foodEaten = self._foodEaten
@@ -425,6 +468,16 @@ class GameStateData:
         state._capsuleEaten = self._capsuleEaten
         return state
 
+    def getMutableAgentState(self, agentIndex):
+        """
+        Returns the AgentState of agent agentIndex for updating, first replacing
+        it with a private copy if it is still shared with the predecessor.
+        """
+        if not self._copiedAgents >> agentIndex & 1:
+            self.agentStates[agentIndex] = self.agentStates[agentIndex].copy()
+            self._copiedAgents |= 1 << agentIndex
+        return self.agentStates[agentIndex]
+
     def copyAgentStates(self, agentStates):
         copiedStates = []
         for agentState in agentStates:
@@ -462,7 +515,7 @@ class GameStateData:
 
     def __str__(self):
         width, height = self.layout.width, self.layout.height
-        map = Grid(width, height)
+        map = [[' '] * height for x in range(width)]
         if type(self.food) == type((1, 2)):
             self.food = reconstituteGrid(self.food)
         for x in range(width):
@@ -485,7 +538,8 @@ class GameStateData:
         for x, y in self.capsules:
             map[x][y] = 'o'
 
-        return str(map) + ("\nScore: %d\n" % self.score)
+        rows = [''.join(map[x][y] for x in range(width)) for y in range(height - 1, -1, -1)]
+        return '\n'.join(rows) + ("\nScore: %d\n" % self.score)
 
     def _foodWallStr(self, hasFood, hasWall):
         if hasFood:
@@ -54,8 +54,27 @@ class DirectionalGhost(GhostAgent):
         self.index = index
         self.prob_attack = prob_attack
         self.prob_scaredFlee = prob_scaredFlee
+        # Distributions already computed on the walls of the current layout,
+        # keyed by the ghost's configuration, Pacman's position and whether
+        # the ghost is scared: nothing else about the state affects them.
+        self.distributions = {}
+        self.walls = None
 
     def getDistribution(self, state):
+        walls = state.getWalls()
+        if walls is not self.walls:
+            self.distributions = {}
+            self.walls = walls
+        ghostState = state.getGhostState(self.index)
+        configuration = ghostState.configuration
+        key = (configuration.pos, configuration.direction,
+               state.getPacmanPosition(), ghostState.scaredTimer > 0)
+        dist = self.distributions.get(key)
+        if dist is None:
+            dist = self.distributions[key] = self.computeDistribution(state)
+        return dist.copy()
+
+    def computeDistribution(self, state):
         # Read variables from state
         ghostState = state.getGhostState(self.index)
         legalActions = state.getLegalActions(self.index)
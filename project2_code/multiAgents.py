@@ -15,6 +15,12 @@
 from util import manhattanDistance
 from game import Directions
 import random, util
+import math
+import time
+import multiprocessing
+import atexit
+import ghostAgents
+import evaluation
 
 from game import Agent
 from pacman import GameState
@@ -106,6 +112,133 @@ def scoreEvaluationFunction(currentGameState: GameState):
     """
     return currentGameState.getScore()
 
+# Random 64-bit keys for the features of a state, drawn on first use from a
+# fixed seed so that keys agree between runs.
+_zobristKeys = {}
+_zobristRandom = random.Random(0)
+
+def zobristKey(feature):
+    key = _zobristKeys.get(feature)
+    if key is None:
+        key = _zobristKeys[feature] = _zobristRandom.getrandbits(64)
+    return key
+
+def agentFeature(agentIndex, agentState):
+    configuration = agentState.configuration
+    return ('agent', agentIndex, configuration.pos, configuration.direction, agentState.scaredTimer)
+
+def stateKey(gameState):
+    """
+    Zobrist hash of everything about a state except its score: the XOR of one
+    key per agent (position, direction and scared timer), per food dot and
+    per capsule.
+    """
+    key = 0
+    for agentIndex, agentState in enumerate(gameState.data.agentStates):
+        key ^= zobristKey(agentFeature(agentIndex, agentState))
+    for position in gameState.getFood().asList():
+        key ^= zobristKey(('food', position))
+    for position in gameState.getCapsules():
+        key ^= zobristKey(('capsule', position))
+    return key
+
+def successorKey(key, gameState, successor):
+    """
+    Updates the stateKey of gameState to that of its successor.  Successors
+    share every AgentState that did not change (see
+    GameStateData.getMutableAgentState), so only the agents whose state was
+    replaced and the food or capsule just eaten need rehashing.
+    """
+    parentAgents, childAgents = gameState.data.agentStates, successor.data.agentStates
+    for agentIndex in range(len(childAgents)):
+        if childAgents[agentIndex] is not parentAgents[agentIndex]:
+            key ^= zobristKey(agentFeature(agentIndex, parentAgents[agentIndex]))
+            key ^= zobristKey(agentFeature(agentIndex, childAgents[agentIndex]))
+    if successor.data._foodEaten is not None:
+        key ^= zobristKey(('food', successor.data._foodEaten))
+    if successor.data._capsuleEaten is not None:
+        key ^= zobristKey(('capsule', successor.data._capsuleEaten))
+    return key
+
+class TranspositionTable:
+    """
+    A fixed number of slots remembering search results, so a state reached
+    again by another move order (or on a later move) is not searched twice.
+
+    Entries are looked up by (stateKey, agent to move, score), and hold the
+    value found, how many plies below the state were searched, whether the
+    value is exact or only a lower or upper bound (after an alpha-beta
+    cutoff), and the best action.  A slot keeps its entry unless a different
+    state or a search at least as deep claims it.
+    """
+    EXACT, LOWER, UPPER = 0, 1, 2
+
+    def __init__(self, size):
+        self.size = size
+        self.slots = [None] * size
+        self.hits = 0
+
+    def lookup(self, key, plies, alpha=float('-inf'), beta=float('inf'), exactDepth=False):
+        """
+        Returns the stored (value, action) for key if it was searched at least
+        plies deep (exactly plies deep with exactDepth) and settles the value
+        within the (alpha, beta) window, else None.
+
+        A deeper entry, e.g. one left by an earlier move's search, can give a
+        different value than searching plies deep would.  Iterative deepening
+        wants that; fixed-depth searches that must match a plain search of
+        self.depth pass exactDepth.
+        """
+        entry = self.slots[hash(key) % self.size]
+        if entry is None or entry[0] != key or entry[1] < plies or (exactDepth and entry[1] != plies):
+            return None
+        _, _, bound, value, action = entry
+        if bound == self.EXACT or (bound == self.LOWER and value >= beta) or \
+                (bound == self.UPPER and value <= alpha):
+            self.hits += 1
+            return value, action
+        return None
+
+    def getBestAction(self, key):
+        "The best action stored for key at any depth, or None."
+        entry = self.slots[hash(key) % self.size]
+        if entry is None or entry[0] != key:
+            return None
+        return entry[4]
+
+    def store(self, key, plies, bound, value, action):
+        slot = hash(key) % self.size
+        entry = self.slots[slot]
+        if entry is None or entry[0] != key or entry[1] <= plies:
+            self.slots[slot] = (key, plies, bound, value, action)
+
+# Share of the game's per-move timeout used by timeLimit=auto.
+AUTO_TIME_FRACTION = 0.5
+
+# The agent a search worker process runs root subtrees for, and the game its
+# transposition table belongs to; set by _initSearchWorker.
+_workerAgent = None
+_workerGame = None
+
+def _initSearchWorker(agent):
+    global _workerAgent
+    _workerAgent = agent
+
+def _searchRootActionInWorker(task):
+    global _workerGame
+    game, gameState, action, alpha = task
+    if game != _workerGame:
+        _workerAgent.table = None
+        _workerGame = game
+    return _workerAgent.rootActionValue(gameState, action, alpha)
+
+def _searchTreeInWorker(task):
+    gameState, seed = task
+    random.seed(seed)
+    root = MCTSNode(gameState.getPacmanPosition())
+    _workerAgent.search(gameState, root)
+    return root.getVisitCounts()
+
 class MultiAgentSearchAgent(Agent):
     """
     This class provides some common elements to all of your
@@ -121,10 +254,93 @@ class MultiAgentSearchAgent(Agent):
     is another abstract class.
     """
 
-    def __init__(self, evalFn = 'scoreEvaluationFunction', depth = '2'):
+    def __init__(self, evalFn = 'scoreEvaluationFunction', depth = '2', tableSize = '0', parallel = '0'):
         self.index = 0 # Pacman is always agent index 0
         self.evaluationFunction = util.lookup(evalFn, globals())
         self.depth = int(depth)
+        # With tableSize > 0 the searches share a TranspositionTable of that
+        # many slots across the moves of a game.
+        self.tableSize = int(tableSize)
+        self.table = None
+        # With parallel > 1 the subtrees below Pacman's root actions are
+        # searched by a pool of that many processes, kept until the game ends.
+        self.parallel = int(parallel)
+        self.pool = None
+        self.gameNumber = 0
+        # Searches with a timeLimit (seconds per move, or 'auto' for
+        # AUTO_TIME_FRACTION of the game's move timeout) set it here.
+        self.timeLimit = None
+        self.moveTimeout = None
+
+    def registerInitialState(self, gameState: GameState):
+        self.gameNumber += 1
+        if self.tableSize > 0:
+            self.table = TranspositionTable(self.tableSize)
+
+    def __getstate__(self):
+        # Worker processes get the agent's settings, not its pool or table.
+        state = self.__dict__.copy()
+        state['pool'] = None
+        state['table'] = None
+        return state
+
+    def rootActionValue(self, gameState, action, alpha=float('-inf')):
+        """
+        Returns the value of Pacman taking action in gameState, the root of a
+        search.  Values at or below alpha may be upper bounds.
+        """
+        util.raiseNotDefined()
+
+    def getWorkerCount(self):
+        "How many worker processes getPool starts."
+        return self.parallel
+
+    def getPool(self):
+        if self.pool is None:
+            self.pool = multiprocessing.Pool(self.getWorkerCount(), _initSearchWorker, (self,))
+            # Games that end without calling final still stop their workers.
+            atexit.register(self.pool.terminate)
+        return self.pool
+
+    def closePool(self):
+        "Stops the worker processes, if any.  The next getPool starts new ones."
+        if self.pool is not None:
+            atexit.unregister(self.pool.terminate)
+            self.pool.close()
+            self.pool.join()
+            self.pool = None
+
+    def final(self, gameState: GameState):
+        "Called by the game when it ends."
+        self.closePool()
+
+    def searchRootActions(self, gameState, actions, alpha=float('-inf')):
+        "Returns rootActionValue for each of actions, searched in parallel."
+        tasks = [(self.gameNumber, gameState, action, alpha) for action in actions]
+        return self.getPool().map(_searchRootActionInWorker, tasks, 1)
+
+    def setMoveTimeout(self, moveTimeout):
+        "Called by ClassicGameRules with the time allowed for each move."
+        self.moveTimeout = moveTimeout
+
+    def getTimeLimit(self):
+        if self.timeLimit == 'auto':
+            if self.moveTimeout is None:
+                raise Exception('timeLimit=auto needs the game rules to set a move timeout')
+            return AUTO_TIME_FRACTION * self.moveTimeout
+        return float(self.timeLimit)
+
+    def getTable(self):
+        if self.table is None and self.tableSize > 0:
+            self.table = TranspositionTable(self.tableSize)
+        return self.table
+
+    def tableKey(self, key, gameState, agentIndex):
+        return key, agentIndex, gameState.getScore()
+
+    def childKey(self, key, gameState, successorState):
+        "The stateKey of successorState, or None when there is no table."
+        return successorKey(key, gameState, successorState) if key is not None else None
 
 class MinimaxAgent(MultiAgentSearchAgent):
     """
@@ -155,18 +371,39 @@ class MinimaxAgent(MultiAgentSearchAgent):
         Returns whether or not the game state is a losing state
         """
         "*** YOUR CODE HERE ***"
-        return self.minimax(gameState, 0, 0)[1]
+        if self.parallel > 1:
+            actions = gameState.getLegalActions(0)
+            values = self.searchRootActions(gameState, actions)
+            return actions[values.index(max(values))]
+        key = stateKey(gameState) if self.getTable() is not None else None
+        return self.minimax(gameState, 0, 0, key)[1]
 #        util.raiseNotDefined()
-    def minimax(self, gameState, agentIndex, depth):
+
+    def rootActionValue(self, gameState, action, alpha=float('-inf')):
+        successorState = gameState.generateSuccessor(0, action)
+        key = stateKey(successorState) if self.getTable() is not None else None
+        return self.minimax(successorState, 1, 0, key)[0]
+
+    def minimax(self, gameState, agentIndex, depth, key=None):
         if gameState.isWin() or gameState.isLose() or depth == self.depth:
             return self.evaluationFunction(gameState), None
         num_Agents = gameState.getNumAgents()
+        useTable = key is not None and (depth > 0 or agentIndex > 0)
+        if useTable:
+            plies = (self.depth - depth) * num_Agents - agentIndex
+            entryKey = self.tableKey(key, gameState, agentIndex)
+            stored = self.table.lookup(entryKey, plies, exactDepth=True)
+            if stored is not None:
+                return stored
         if agentIndex == 0:
-            return self.maxValue(gameState, agentIndex, depth)
+            result = self.maxValue(gameState, agentIndex, depth, key)
         else:
-            return self.minValue(gameState, agentIndex, depth)
+            result = self.minValue(gameState, agentIndex, depth, key)
+        if useTable:
+            self.table.store(entryKey, plies, TranspositionTable.EXACT, *result)
+        return result
 
-    def maxValue(self, gameState, agentIndex, depth):
+    def maxValue(self, gameState, agentIndex, depth, key=None):
         legal_Actions = gameState.getLegalActions(agentIndex)
         if not legal_Actions:
             return self.evaluationFunction(gameState), None
@@ -175,13 +412,13 @@ class MinimaxAgent(MultiAgentSearchAgent):
 
         for action in legal_Actions:
             successorState = gameState.generateSuccessor(agentIndex, action)
-            score = self.minimax(successorState, 1, depth)[0]
+            score = self.minimax(successorState, 1, depth, self.childKey(key, gameState, successorState))[0]
             if score > best_Score:
                 best_Score = score
                 best_Action = action
         return best_Score, best_Action
 
-    def minValue(self, gameState, agentIndex, depth):
+    def minValue(self, gameState, agentIndex, depth, key=None):
         legal_Actions = gameState.getLegalActions(agentIndex)
         if not legal_Actions:
             return self.evaluationFunction(gameState), None
@@ -190,67 +427,213 @@ class MinimaxAgent(MultiAgentSearchAgent):
 
         for action in legal_Actions:
             successorState = gameState.generateSuccessor(agentIndex, action)
+            successor_Key = self.childKey(key, gameState, successorState)
             if agentIndex == gameState.getNumAgents() - 1:
-                score = self.minimax(successorState, 0, depth + 1)[0]
+                score = self.minimax(successorState, 0, depth + 1, successor_Key)[0]
             else:
-                score = self.minimax(successorState, agentIndex + 1, depth)[0]
+                score = self.minimax(successorState, agentIndex + 1, depth, successor_Key)[0]
 
             if score < best_Score:
                 best_Score = score
                 best_Action = action
         return best_Score, best_Action
 
+class SearchTimeout(Exception):
+    "Raised inside an iterative deepening search when its time is up."
+
+# Iterative deepening gives up on deeper searches past this many rounds.
+MAX_ITERATIVE_DEPTH = 50
+# Table slots for iterative deepening when tableSize is not given.
+ITERATIVE_TABLE_SIZE = 100000
+
 class AlphaBetaAgent(MultiAgentSearchAgent):
     """
     Your minimax agent with alpha-beta pruning (question 3)
+
+    By default this searches exactly self.depth rounds.  With a timeLimit
+    agent argument (seconds per move, or 'auto' for AUTO_TIME_FRACTION of the
+    game's move timeout) it instead deepens one round at a time until the time
+    is up and plays the move of the deepest search that finished.  Each
+    iteration tries the best move of the previous one first (from the
+    transposition table), then killer moves that caused cutoffs at the same
+    ply, then moves by their history of causing cutoffs.
     """
 
+    def __init__(self, evalFn = 'scoreEvaluationFunction', depth = '2', tableSize = '0', parallel = '0',
+                 timeLimit = None):
+        if timeLimit is not None and int(tableSize) == 0:
+            tableSize = ITERATIVE_TABLE_SIZE
+        MultiAgentSearchAgent.__init__(self, evalFn, depth, tableSize, parallel)
+        if timeLimit is not None and self.parallel > 1:
+            raise Exception('AlphaBetaAgent cannot combine timeLimit with parallel')
+        self.timeLimit = timeLimit
+        self.searchDepth = self.depth
+        self.orderMoves = False
+        self.deadline = None
+
     def getAction(self, gameState: GameState):
         """
         Returns the minimax action using self.depth and self.evaluationFunction
         """
         "*** YOUR CODE HERE ***"
 #        util.raiseNotDefined()
+        if self.timeLimit is not None:
+            return self.iterativeDeepening(gameState)
+        if self.parallel > 1:
+            return self.parallelAlphaBeta(gameState)
         alpha = float('-inf')
         beta = float('inf')
-        value, action = self.alphaBeta(gameState, 0, 0, alpha, beta)
+        self.searchDepth = self.depth
+        key = stateKey(gameState) if self.getTable() is not None else None
+        value, action = self.alphaBeta(gameState, 0, 0, alpha, beta, key)
         return action
 
-    def alphaBeta(self, gameState, agent_Index, depth, alpha, beta):
-        if gameState.isWin() or gameState.isLose() or depth == self.depth:
+    def rootActionValue(self, gameState, action, alpha=float('-inf')):
+        self.searchDepth = self.depth
+        successorState = gameState.generateSuccessor(0, action)
+        key = stateKey(successorState) if self.getTable() is not None else None
+        return self.alphaBeta(successorState, 1, 0, alpha, float('inf'), key)[0]
+
+    def parallelAlphaBeta(self, gameState):
+        """
+        Young brothers wait at the root: the first action is searched here,
+        and its value is the alpha bound for searching the others in
+        parallel.  Only values above that bound are exact, and only they can
+        win, so this picks the same action as the serial search.
+        """
+        actions = gameState.getLegalActions(0)
+        firstValue = self.rootActionValue(gameState, actions[0])
+        values = [firstValue] + self.searchRootActions(gameState, actions[1:], firstValue)
+        return actions[values.index(max(values))]
+
+    def iterativeDeepening(self, gameState):
+        """
+        Searches 1, 2, ... rounds deep until the time limit, and returns the
+        best action of the deepest search that finished.  Stops early once a
+        search reaches no depth cutoff, since deeper ones would repeat it.
+        """
+        self.deadline = time.time() + self.getTimeLimit()
+        self.orderMoves = True
+        self.killers = {}
+        self.history = util.Counter()
+        self.nodesSearched = 0
+        key = stateKey(gameState)
+        self.getTable()
+        bestAction = None
+        self.completedDepth = 0
+        try:
+            for searchDepth in range(1, MAX_ITERATIVE_DEPTH + 1):
+                self.searchDepth = searchDepth
+                self.reachedDepthLimit = False
+                value, action = self.alphaBeta(gameState, 0, 0, float('-inf'), float('inf'), key)
+                bestAction, self.completedDepth = action, searchDepth
+                if not self.reachedDepthLimit:
+                    break
+        except SearchTimeout:
+            pass
+        finally:
+            self.deadline = None
+            self.orderMoves = False
+        if bestAction is None:
+            # Not even one round finished; fall back on the table's best guess.
+            bestAction = self.table.getBestAction(self.tableKey(key, gameState, 0)) or \
+                gameState.getLegalActions(0)[0]
+        return bestAction
+
+    def orderActions(self, gameState, agent_Index, depth, actions, key):
+        "Sorts actions by table move, then killer moves, then history."
+        ply = depth * gameState.getNumAgents() + agent_Index
+        tableAction = self.table.getBestAction(self.tableKey(key, gameState, agent_Index))
+        killers = self.killers.get(ply, ())
+        position = gameState.data.agentStates[agent_Index].getPosition()
+
+        def priority(action):
+            if action == tableAction:
+                return 2, 0
+            if action in killers:
+                return 1, 0
+            return 0, self.history[agent_Index, position, action]
+        return sorted(actions, key=priority, reverse=True)
+
+    def recordCutoff(self, gameState, agent_Index, depth, action):
+        "Remembers action as a killer at this ply and credits its history."
+        ply = depth * gameState.getNumAgents() + agent_Index
+        killers = self.killers.get(ply, ())
+        if action not in killers:
+            self.killers[ply] = (action,) + killers[:1]
+        plies = (self.searchDepth - depth) * gameState.getNumAgents() - agent_Index
+        position = gameState.data.agentStates[agent_Index].getPosition()
+        self.history[agent_Index, position, action] += plies * plies
+
+    def alphaBeta(self, gameState, agent_Index, depth, alpha, beta, key=None):
+        if self.deadline is not None:
+            self.nodesSearched += 1
+            if self.nodesSearched % 256 == 0 and time.time() > self.deadline:
+                raise SearchTimeout()
+        if gameState.isWin() or gameState.isLose():
+            return self.evaluationFunction(gameState), None
+        if depth == self.searchDepth:
+            self.reachedDepthLimit = True
             return self.evaluationFunction(gameState), None
         num_Agents = gameState.getNumAgents()
+        isRoot = depth == 0 and agent_Index == 0
+        if key is not None:
+            plies = (self.searchDepth - depth) * num_Agents - agent_Index
+            entryKey = self.tableKey(key, gameState, agent_Index)
+        if key is not None and not isRoot:
+            stored = self.table.lookup(entryKey, plies, alpha, beta, exactDepth=self.timeLimit is None)
+            if stored is not None:
+                # The stored search may have stopped at a depth cutoff.
+                self.reachedDepthLimit = True
+                return stored
         if agent_Index == 0:
-            return self.maxValue(gameState, agent_Index, depth, alpha, beta)
+            result = self.maxValue(gameState, agent_Index, depth, alpha, beta, key)
         else:
-            return self.minValue(gameState, agent_Index, depth, alpha, beta)
+            result = self.minValue(gameState, agent_Index, depth, alpha, beta, key)
+        if key is not None:
+            # Outside the window the search was cut short, so the value is only a bound.
+            if result[0] <= alpha:
+                bound = TranspositionTable.UPPER
+            elif result[0] >= beta:
+                bound = TranspositionTable.LOWER
+            else:
+                bound = TranspositionTable.EXACT
+            self.table.store(entryKey, plies, bound, *result)
+        return result
 
-    def maxValue(self, gameState, agent_Index, depth, alpha, beta):
+    def maxValue(self, gameState, agent_Index, depth, alpha, beta, key=None):
         best_Value = float('-inf')
         best_Action = None
         legal_Actions = gameState.getLegalActions(agent_Index)
         if not legal_Actions:
             return self.evaluationFunction(gameState), None
+        if self.orderMoves:
+            legal_Actions = self.orderActions(gameState, agent_Index, depth, legal_Actions, key)
 
         for action in legal_Actions:
             successorState = gameState.generateSuccessor(agent_Index, action)
-            value, _ = self.alphaBeta(successorState, agent_Index + 1, depth, alpha, beta)
+            value, _ = self.alphaBeta(successorState, agent_Index + 1, depth, alpha, beta,
+                                      self.childKey(key, gameState, successorState))
 
             if value > best_Value:
                 best_Value = value
                 best_Action = action
             if best_Value > beta:
+                if self.orderMoves:
+                    self.recordCutoff(gameState, agent_Index, depth, action)
                 return best_Value, best_Action
             alpha = max(alpha, best_Value)
         return best_Value, best_Action
 
-    def minValue(self, gameState, agent_Index, depth, alpha, beta):
+    def minValue(self, gameState, agent_Index, depth, alpha, beta, key=None):
         best_Value = float('inf')
         best_Action = None
 
         legal_Actions = gameState.getLegalActions(agent_Index)
         if not legal_Actions:
             return self.evaluationFunction(gameState), None
+        if self.orderMoves:
+            legal_Actions = self.orderActions(gameState, agent_Index, depth, legal_Actions, key)
 
         for action in legal_Actions:
             successorState = gameState.generateSuccessor(agent_Index, action)
@@ -260,11 +643,14 @@ class AlphaBetaAgent(MultiAgentSearchAgent):
             else:
                 next_Agent_Index = agent_Index + 1
                 next_Depth = depth
-            value, _ = self.alphaBeta(successorState, next_Agent_Index, next_Depth, alpha, beta)
+            value, _ = self.alphaBeta(successorState, next_Agent_Index, next_Depth, alpha, beta,
+                                      self.childKey(key, gameState, successorState))
             if value < best_Value:
                 best_Value = value
                 best_Action = action
             if best_Value < alpha:
+                if self.orderMoves:
+                    self.recordCutoff(gameState, agent_Index, depth, action)
                 return best_Value, best_Action
             beta = min(beta, best_Value)
         return best_Value, best_Action
@@ -274,6 +660,25 @@ class ExpectimaxAgent(MultiAgentSearchAgent):
       Your expectimax agent (question 4)
     """
 
+    def __init__(self, evalFn = 'scoreEvaluationFunction', depth = '2', tableSize = '0', parallel = '0',
+                 chanceCache = '0', ghost = None):
+        MultiAgentSearchAgent.__init__(self, evalFn, depth, tableSize, parallel)
+        # With chanceCache set, the value of each ghost node is kept for the
+        # rest of the move, so ghost configurations reached along different
+        # Pacman paths are averaged only once.
+        self.chanceCache = bool(int(chanceCache))
+        self.chanceValues = None
+        self.chanceRoot = None
+        # ghost names a class in ghostAgents whose getDistribution weights the
+        # ghost moves, e.g. DirectionalGhost; by default they are uniform.
+        self.ghostType = util.lookup(ghost, vars(ghostAgents)) if ghost is not None else None
+        self.ghostModels = {}
+
+    def getGhostModel(self, agentIndex):
+        if agentIndex not in self.ghostModels:
+            self.ghostModels[agentIndex] = self.ghostType(agentIndex)
+        return self.ghostModels[agentIndex]
+
     def getAction(self, gameState: GameState):
         """
         Returns the expectimax action using self.depth and self.evaluationFunction
@@ -282,77 +687,249 @@ class ExpectimaxAgent(MultiAgentSearchAgent):
         legal moves.
         """
         "*** YOUR CODE HERE ***"
-        def expectimax(gameState, depth, agent_Index):
-            if gameState.isWin() or gameState.isLose() or depth == 0:
-                return self.evaluationFunction(gameState)
+        actions = gameState.getLegalActions(0)
+        if self.parallel > 1:
+            values = self.searchRootActions(gameState, actions)
+        else:
+            values = [self.rootActionValue(gameState, action) for action in actions]
+        bestAction = actions[values.index(max(values))]
+        return bestAction
 
-            if agent_Index == 0:
-                return max(expectimax(gameState.generateSuccessor(agent_Index, action), depth, 1)
-                           for action in gameState.getLegalActions(agent_Index))
+    def rootActionValue(self, gameState, action, alpha=float('-inf')):
+        if self.chanceCache and gameState is not self.chanceRoot:
+            self.chanceValues = {}
+            self.chanceRoot = gameState
+        successor = gameState.generateSuccessor(0, action)
+        key = stateKey(successor) if self.getTable() is not None or self.chanceCache else None
+        return self.expectimax(successor, self.depth, 1, key)
+
+    def expectimax(self, gameState, depth, agent_Index, key=None):
+        if gameState.isWin() or gameState.isLose() or depth == 0:
+            return self.evaluationFunction(gameState)
+
+        if self.table is not None:
+            plies = depth * gameState.getNumAgents() - agent_Index
+            entryKey = self.tableKey(key, gameState, agent_Index)
+            stored = self.table.lookup(entryKey, plies, exactDepth=True)
+            if stored is not None:
+                return stored[0]
+        value = self.expectedValue(gameState, depth, agent_Index, key)
+        if self.table is not None:
+            self.table.store(entryKey, plies, TranspositionTable.EXACT, value, None)
+        return value
+
+    def expectedValue(self, gameState, depth, agent_Index, key=None):
+        if agent_Index == 0:
+            return max(self.expectimax(successor, depth, 1, self.childKey(key, gameState, successor))
+                       for successor in (gameState.generateSuccessor(agent_Index, action)
+                                         for action in gameState.getLegalActions(agent_Index)))
 
-            else:
-                nextAgent = agent_Index + 1
-                if agent_Index == gameState.getNumAgents() - 1:
-                    nextAgent = 0
-                    depth -= 1
-
-                legalActions = gameState.getLegalActions(agent_Index)
-                if not legalActions:
-                    return self.evaluationFunction(gameState)
-
-                probability = 1 / len(legalActions)
-                expectedValue = sum(expectimax(gameState.generateSuccessor(agent_Index, action), depth, nextAgent)
-                                    for action in legalActions) * probability
-                return expectedValue
-
-        bestAction = max(gameState.getLegalActions(0),
-                         key=lambda action: expectimax(gameState.generateSuccessor(0, action), self.depth, 1))
+        elif self.chanceCache:
+            cacheKey = (self.tableKey(key, gameState, agent_Index), depth)
+            value = self.chanceValues.get(cacheKey)
+            if value is None:
+                value = self.chanceValues[cacheKey] = self.chanceValue(gameState, depth, agent_Index, key)
+            return value
+
+        else:
+            return self.chanceValue(gameState, depth, agent_Index, key)
+
+    def chanceValue(self, gameState, depth, agent_Index, key=None):
+        nextAgent = agent_Index + 1
+        if agent_Index == gameState.getNumAgents() - 1:
+            nextAgent = 0
+            depth -= 1
+
+        legalActions = gameState.getLegalActions(agent_Index)
+        if not legalActions:
+            return self.evaluationFunction(gameState)
+
+        if self.ghostType is not None:
+            distribution = self.getGhostModel(agent_Index).getDistribution(gameState)
+            return sum(probability * self.expectimax(successor, depth, nextAgent,
+                                                     self.childKey(key, gameState, successor))
+                       for successor, probability in ((gameState.generateSuccessor(agent_Index, action), probability)
+                                                      for action, probability in distribution.items()
+                                                      if probability > 0))
+
+        probability = 1 / len(legalActions)
+        expectedValue = sum(self.expectimax(successor, depth, nextAgent, self.childKey(key, gameState, successor))
+                            for successor in (gameState.generateSuccessor(agent_Index, action)
+                                              for action in legalActions)) * probability
+        return expectedValue
+
+class MCTSNode:
+    """
+    Search statistics for one sequence of Pacman actions from the root.  The
+    tree is open loop: ghost moves are sampled again on every simulation, so
+    a node stands for all the states its actions can lead to.  Pacman's own
+    moves are deterministic, so they all have him at the same position.
+    """
+
+    def __init__(self, position):
+        self.position = position
+        self.children = {}
+        self.visits = 0
+        self.totalValue = 0.0
+
+    def getMeanValue(self):
+        return self.totalValue / self.visits
+
+    def getVisitCounts(self):
+        return dict((action, child.visits) for action, child in self.children.items())
+
+class MCTSAgent(MultiAgentSearchAgent):
+    """
+    Monte Carlo tree search with UCT.  Each simulation follows the tree by
+    UCT to a new node, plays on with rolloutAction until self.depth rounds
+    from the root or the end of the game, and backs up the evaluation of the
+    state it reached.  The agent plays the most simulated root action.
+
+    It runs iterations simulations per move, or with a timeLimit (seconds, or
+    'auto') as many as fit.  The subtree of the action played is kept for the
+    next move.  With parallel > 1, parallel - 1 worker processes each search
+    a tree of their own from the same root, and their root visit counts are
+    added to this one's.
+    """
+
+    def __init__(self, evalFn = 'scoreEvaluationFunction', depth = '10', tableSize = '0', parallel = '0',
+                 iterations = '1000', timeLimit = None, exploration = '1.0'):
+        MultiAgentSearchAgent.__init__(self, evalFn, depth, tableSize, parallel)
+        self.iterations = int(iterations)
+        if self.iterations < 1:
+            raise Exception('MCTSAgent needs iterations >= 1')
+        self.timeLimit = timeLimit
+        # UCT exploration constant, in units of the range of values seen.
+        self.exploration = float(exploration)
+        self.root = None
+        self.minValue = float('inf')
+        self.maxValue = float('-inf')
+
+    def registerInitialState(self, gameState: GameState):
+        MultiAgentSearchAgent.registerInitialState(self, gameState)
+        self.root = None
+
+    def __getstate__(self):
+        state = MultiAgentSearchAgent.__getstate__(self)
+        state['root'] = None
+        return state
+
+    def getWorkerCount(self):
+        # This process runs one of the parallel searches itself.
+        return self.parallel - 1
+
+    def getAction(self, gameState: GameState):
+        root = self.root
+        if root is None or root.position != gameState.getPacmanPosition():
+            root = MCTSNode(gameState.getPacmanPosition())
+
+        workers = None
+        if self.parallel > 1:
+            tasks = [(gameState, random.getrandbits(64)) for i in range(self.parallel - 1)]
+            workers = self.getPool().map_async(_searchTreeInWorker, tasks, 1)
+        self.search(gameState, root)
+        visits = root.getVisitCounts()
+        if workers is not None:
+            for counts in workers.get():
+                for action, count in counts.items():
+                    visits[action] = visits.get(action, 0) + count
+
+        bestAction = max(visits, key=visits.get)
+        self.root = root.children.get(bestAction)
         return bestAction
 
+    def search(self, gameState, root):
+        "Runs this move's simulations from gameState, adding them to root."
+        self.minValue = float('inf')
+        self.maxValue = float('-inf')
+        if self.timeLimit is None:
+            for i in range(self.iterations):
+                self.simulate(gameState, root)
+        else:
+            deadline = time.time() + self.getTimeLimit()
+            self.simulate(gameState, root)
+            while time.time() < deadline:
+                self.simulate(gameState, root)
+
+    def simulate(self, gameState, root):
+        root.visits += 1
+        path = [root]
+        node = root
+        rounds = 0
+        while rounds < self.depth and not (gameState.isWin() or gameState.isLose()):
+            actions = gameState.getLegalActions(0)
+            untried = [action for action in actions if action not in node.children]
+            if untried:
+                action = random.choice(untried)
+            else:
+                action = self.selectAction(node, actions)
+            gameState = gameState.generateSuccessor(0, action)
+            if untried:
+                node.children[action] = MCTSNode(gameState.getPacmanPosition())
+            node = node.children[action]
+            path.append(node)
+            gameState = self.moveGhosts(gameState)
+            rounds += 1
+            if untried:
+                break
+
+        while rounds < self.depth and not (gameState.isWin() or gameState.isLose()):
+            gameState = gameState.generateSuccessor(0, self.rolloutAction(gameState, 0))
+            gameState = self.moveGhosts(gameState)
+            rounds += 1
+
+        value = self.evaluationFunction(gameState)
+        self.minValue = min(self.minValue, value)
+        self.maxValue = max(self.maxValue, value)
+        for node in path[1:]:
+            node.visits += 1
+        for node in path:
+            node.totalValue += value
+
+    def selectAction(self, node, actions):
+        "The UCT choice among actions, all of which have been tried at node."
+        scale = self.exploration * max(self.maxValue - self.minValue, 1)
+        logVisits = math.log(node.visits)
+        def upperBound(action):
+            child = node.children[action]
+            return child.getMeanValue() + scale * math.sqrt(logVisits / child.visits)
+        return max(actions, key=upperBound)
+
+    def moveGhosts(self, gameState):
+        for agentIndex in range(1, gameState.getNumAgents()):
+            if gameState.isWin() or gameState.isLose():
+                break
+            gameState = gameState.generateSuccessor(agentIndex, self.rolloutAction(gameState, agentIndex))
+        return gameState
+
+    def rolloutAction(self, gameState, agentIndex):
+        """
+        The move agentIndex makes outside the tree.  Pacman moves at random
+        but does not stop or turn back unless he has to; ghosts move uniformly
+        at random.
+        """
+        actions = gameState.getLegalActions(agentIndex)
+        if agentIndex == 0:
+            reverse = Directions.REVERSE[gameState.getPacmanState().configuration.direction]
+            forward = [action for action in actions if action != Directions.STOP and action != reverse]
+            if forward:
+                actions = forward
+        return random.choice(actions)
+
 def betterEvaluationFunction(currentGameState: GameState):
     """
     Your extreme ghost-hunting, pellet-nabbing, food-gobbling, unstoppable
     evaluation function (question 5).
 
-    DESCRIPTION: <write something here so we know what you did>
+    DESCRIPTION: the score, less distances to the nearest food and capsule
+    and counts of what is left, with a penalty for nearby ghosts and a bonus
+    for nearby scared ones; see evaluation.evaluate.
     """
     "*** YOUR CODE HERE ***"
-    pacman_Position = currentGameState.getPacmanPosition()
-    food = currentGameState.getFood()
-    ghosts = currentGameState.getGhostStates()
-    capsules = currentGameState.getCapsules()
-    score = currentGameState.getScore()
-
-    food_Distances = [manhattanDistance(pacman_Position, foodPos) for foodPos in food.asList()]
-    if food_Distances:
-        closest_Food_Distance = min(food_Distances)
-    else:
-        closest_Food_Distance = 0
-
-    ghost_Distances = [manhattanDistance(pacman_Position, ghost.getPosition()) for ghost in ghosts]
-    scared_Times = [ghost.scaredTimer for ghost in ghosts]
-
-    capsule_Distances = [manhattanDistance(pacman_Position, capsule) for capsule in capsules]
-    if capsule_Distances:
-        closest_Capsule_Distance = min(capsule_Distances)
-    else:
-        closest_Capsule_Distance = 0
-
-    food_Score = -1.5 * closest_Food_Distance
-    ghost_Score = 0
-    capsule_Score = -2 * closest_Capsule_Distance if capsules else 0
-    scared_Ghost_Score = 0
-    remaining_Food_Score = -4 * len(food.asList())
-    remaining_Capsule_Score = -20 * len(capsules)
-
-    for i in range(len(ghosts)):
-        if scared_Times[i] > 0:
-            scared_Ghost_Score += 200 / (ghost_Distances[i] + 1)
-        else:
-            if ghost_Distances[i] > 0:
-                ghost_Score += -10 / ghost_Distances[i]
+    return evaluation.evaluate(currentGameState)
 
-    evaluation = score + food_Score + ghost_Score + capsule_Score + scared_Ghost_Score + remaining_Food_Score + remaining_Capsule_Score
-    return evaluation
+def betterEvaluations(gameStates):
+    "Returns betterEvaluationFunction for each of gameStates, evaluated together."
+    return evaluation.evaluateStates(gameStates)
 
 better = betterEvaluationFunction
@@ -180,6 +180,8 @@ class GradingAgent(Agent):
         self.seed = seed
 
     def registerInitialState(self, state):
+        # Grading compares how many distinct states the agent explores.
+        GameState.setExploreMode(GameState.EXPLORE_STATES)
         if 'registerInitialState' in dir(self.studentAgent):
             self.studentAgent.registerInitialState(state)
         random.seed(self.seed)
@@ -288,6 +290,7 @@ class PolyAgent(Agent):
         return (ourpac, alternative_depth_pacs, partial_ply_bug_pacs)
 
     def registerInitialState(self, state):
+        GameState.setExploreMode(GameState.EXPLORE_STATES)
         for agent in self.solutionAgents + self.alternativeDepthAgents:
             if 'registerInitialState' in dir(agent):
                 agent.registerInitialState(state)
@@ -77,8 +77,28 @@ class GameState:
     # Accessor methods: use these to access state data #
     ####################################################
 
-    # static variable keeps track of which states have had getLegalActions called
+    # What generateSuccessor records about the states it touches, for the
+    # autograder: nothing (the default), how many successors were generated
+    # (exploredCount), or also every distinct parent and successor state
+    # (explored).  Recording states hashes each one and keeps it alive.
+    EXPLORE_NONE = 0
+    EXPLORE_COUNT = 1
+    EXPLORE_STATES = 2
+    exploreMode = EXPLORE_NONE
     explored = set()
+    exploredCount = 0
+
+    def setExploreMode(mode):
+        GameState.exploreMode = mode
+        GameState.explored = set()
+        GameState.exploredCount = 0
+    setExploreMode = staticmethod(setExploreMode)
+
+    def getAndResetExploredCount():
+        count = GameState.exploredCount
+        GameState.exploredCount = 0
+        return count
+    getAndResetExploredCount = staticmethod(getAndResetExploredCount)
 
     def getAndResetExplored():
         tmp = GameState.explored.copy()
@@ -107,7 +127,7 @@ class GameState:
         if self.isWin() or self.isLose():
             raise Exception('Can\'t generate a successor of a terminal state.')
 
-        # Copy current state
+        # Share the current state; the rules copy whatever they change
         state = GameState(self)
 
         # Let agent's logic deal with its action's effects on the board
@@ -129,8 +149,11 @@ class GameState:
         # Book keeping
         state.data._agentMoved = agentIndex
         state.data.score += state.data.scoreChange
-        GameState.explored.add(self)
-        GameState.explored.add(state)
+        if GameState.exploreMode:
+            GameState.exploredCount += 1
+            if GameState.exploreMode == GameState.EXPLORE_STATES:
+                GameState.explored.add(self)
+                GameState.explored.add(state)
         return state
 
     def getLegalPacmanActions(self):
@@ -285,6 +308,8 @@ class ClassicGameRules:
 
     def newGame(self, layout, pacmanAgent, ghostAgents, display, quiet=False, catchExceptions=False):
         agents = [pacmanAgent] + ghostAgents[:layout.getNumGhosts()]
+        if 'setMoveTimeout' in dir(pacmanAgent):
+            pacmanAgent.setMoveTimeout(self.getMoveTimeout(0))
         initState = GameState()
         initState.initialize(layout, len(ghostAgents))
         game = Game(agents, display, self, catchExceptions=catchExceptions)
@@ -348,7 +373,7 @@ class PacmanRules:
         """
         Returns a list of possible actions.
         """
-        return Actions.getPossibleActions(state.getPacmanState().configuration, state.data.layout.walls)
+        return Actions.getPossibleActions(state.data.agentStates[0].configuration, state.data.layout.walls)
     getLegalActions = staticmethod(getLegalActions)
 
     def applyAction(state, action):
@@ -359,7 +384,7 @@ class PacmanRules:
         if action not in legal:
             raise Exception("Illegal action " + str(action))
 
-        pacmanState = state.data.agentStates[0]
+        pacmanState = state.data.getMutableAgentState(0)
 
         # Update Configuration
         vector = Actions.directionToVector(action, PacmanRules.PACMAN_SPEED)
@@ -379,7 +404,7 @@ class PacmanRules:
         # Eat food
         if state.data.food[x][y]:
             state.data.scoreChange += 10
-            state.data.food = state.data.food.copy()
+            state.data.food = state.data.food.copy()  # Shared with the predecessor until now
             state.data.food[x][y] = False
             state.data._foodEaten = position
             # TODO: cache numFood?
@@ -389,11 +414,12 @@ class PacmanRules:
                 state.data._win = True
         # Eat capsule
         if(position in state.getCapsules()):
+            state.data.capsules = state.data.capsules[:]
             state.data.capsules.remove(position)
             state.data._capsuleEaten = position
             # Reset all ghosts' scared timers
             for index in range(1, len(state.data.agentStates)):
-                state.data.agentStates[index].scaredTimer = SCARED_TIME
+                state.data.getMutableAgentState(index).scaredTimer = SCARED_TIME
     consume = staticmethod(consume)
 
 
@@ -425,7 +451,7 @@ class GhostRules:
         if action not in legal:
             raise Exception("Illegal ghost action " + str(action))
 
-        ghostState = state.data.agentStates[ghostIndex]
+        ghostState = state.data.getMutableAgentState(ghostIndex)
         speed = GhostRules.GHOST_SPEED
         if ghostState.scaredTimer > 0:
             speed /= 2.0
@@ -460,9 +486,11 @@ class GhostRules:
     def collide(state, ghostState, agentIndex):
         if ghostState.scaredTimer > 0:
             state.data.scoreChange += 200
+            ghostState = state.data.getMutableAgentState(agentIndex)
             GhostRules.placeGhost(state, ghostState)
             ghostState.scaredTimer = 0
             # Added for first-person
+            state.data._eaten = state.data._eaten[:]
             state.data._eaten[agentIndex] = True
         else:
             if not state.data._win:
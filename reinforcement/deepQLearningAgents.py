@@ -46,7 +46,7 @@ class PacmanDeepQAgent(PacmanQAgent):
         pacman_state = np.array(state.getPacmanPosition())
         ghost_state = np.array(state.getGhostPositions())
         capsules = state.getCapsules()
-        food_locations = np.array(state.getFood().data).astype(np.float32)
+        food_locations = np.array(state.getFood().asArray()).astype(np.float32)
         for x, y in capsules:
             food_locations[x][y] = 2
         return np.concatenate((pacman_state, ghost_state.flatten(), food_locations.flatten()))
@@ -123,7 +123,7 @@ class PacmanDeepQAgent(PacmanQAgent):
         reward = self.shape_reward(reward)
 
         if self.counts is None:
-            x, y = np.array(state.getFood().data).shape
+            x, y = state.getFood().asArray().shape
             self.counts = np.ones((x, y))
 
         state = self.get_features(state)
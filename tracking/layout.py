@@ -13,13 +13,22 @@
 
 
 from util import manhattanDistance
+import util
 from game import Grid
 import os
+import mmap
+import array
 import random
-from functools import reduce
+import struct
+import hashlib
 
 VISIBILITY_MATRIX_CACHE = {}
 
+LAYOUT_CACHE_DIR = util.getCacheDirectory('pacman_layouts')
+
+# Compiled layouts by hash of the layout file, shared by every game in this process.
+_compiledLayouts = {}
+
 class Layout:
     """
     A Layout manages the static information about the game board.
@@ -36,31 +45,72 @@ class Layout:
         self.processLayoutText(layoutText)
         self.layoutText = layoutText
         self.totalFood = len(self.food.asList())
+        self.cacheKey = None
+        self.wallDistances = None
         # self.initializeVisibilityMatrix()
 
     def getNumGhosts(self):
         return self.numGhosts
 
+    def getCacheKey(self):
+        "A hash of the layout text, used to share compiled data between equal layouts."
+        if self.cacheKey is None:
+            self.cacheKey = hashlib.sha1('\n'.join(self.layoutText).encode()).hexdigest()
+        return self.cacheKey
+
+    def getWallDistances(self):
+        """
+        For every cell and each of the four directions, how many steps away the
+        nearest wall is, as a flat array indexed by (x * height + y) * 4 + d
+        with d running west, east, south, north.  Wall cells hold 0.
+        """
+        if self.wallDistances is None:
+            width, height, walls = self.width, self.height, self.walls
+            distances = array.array('H', bytes(8 * width * height))
+            for y in range(height):
+                for x in range(1, width):
+                    if not walls[x][y]:
+                        i = (x * height + y) * 4
+                        distances[i] = 1 if walls[x - 1][y] else distances[i - 4 * height] + 1
+                for x in range(width - 2, -1, -1):
+                    if not walls[x][y]:
+                        i = (x * height + y) * 4
+                        distances[i + 1] = 1 if walls[x + 1][y] else distances[i + 1 + 4 * height] + 1
+            for x in range(width):
+                for y in range(1, height):
+                    if not walls[x][y]:
+                        i = (x * height + y) * 4
+                        distances[i + 2] = 1 if walls[x][y - 1] else distances[i + 2 - 4] + 1
+                for y in range(height - 2, -1, -1):
+                    if not walls[x][y]:
+                        i = (x * height + y) * 4
+                        distances[i + 3] = 1 if walls[x][y + 1] else distances[i + 3 + 4] + 1
+            self.wallDistances = distances
+        return self.wallDistances
+
     def initializeVisibilityMatrix(self):
         global VISIBILITY_MATRIX_CACHE
-        if reduce(str.__add__, self.layoutText) not in VISIBILITY_MATRIX_CACHE:
+        key = self.getCacheKey()
+        if key not in VISIBILITY_MATRIX_CACHE:
             from game import Directions
+            # Each ray runs in half steps up to, but not onto, the nearest wall.
             vecs = [(-0.5,0), (0.5,0),(0,-0.5),(0,0.5)]
             dirs = [Directions.NORTH, Directions.SOUTH, Directions.WEST, Directions.EAST]
-            vis = Grid(self.width, self.height, {Directions.NORTH:set(), Directions.SOUTH:set(), Directions.EAST:set(), Directions.WEST:set(), Directions.STOP:set()})
+            distances = self.getWallDistances()
+            vis = [[None] * self.height for x in range(self.width)]
             for x in range(self.width):
                 for y in range(self.height):
+                    cell = {Directions.NORTH:set(), Directions.SOUTH:set(), Directions.EAST:set(), Directions.WEST:set(), Directions.STOP:set()}
                     if self.walls[x][y] == False:
-                        for vec, direction in zip(vecs, dirs):
+                        i = (x * self.height + y) * 4
+                        for d, (vec, direction) in enumerate(zip(vecs, dirs)):
                             dx, dy = vec
-                            nextx, nexty = x + dx, y + dy
-                            while (nextx + nexty) != int(nextx) + int(nexty) or not self.walls[int(nextx)][int(nexty)] :
-                                vis[x][y][direction].add((nextx, nexty))
-                                nextx, nexty = x + dx, y + dy
+                            cell[direction].update((x + k * dx, y + k * dy) for k in range(1, 2 * distances[i + d]))
+                    vis[x][y] = cell
             self.visibility = vis
-            VISIBILITY_MATRIX_CACHE[reduce(str.__add__, self.layoutText)] = vis
+            VISIBILITY_MATRIX_CACHE[key] = vis
         else:
-            self.visibility = VISIBILITY_MATRIX_CACHE[reduce(str.__add__, self.layoutText)]
+            self.visibility = VISIBILITY_MATRIX_CACHE[key]
 
     def isWall(self, pos):
         x, col = pos
@@ -91,7 +141,14 @@ class Layout:
         return "\n".join(self.layoutText)
 
     def deepCopy(self):
-        return Layout(self.layoutText[:])
+        layout = Layout.__new__(Layout)
+        layout.__dict__.update(self.__dict__)
+        layout.walls = self.walls.copy()
+        layout.food = self.food.copy()
+        layout.capsules = self.capsules[:]
+        layout.agentPositions = self.agentPositions[:]
+        layout.layoutText = self.layoutText[:]
+        return layout
 
     def processLayoutText(self, layoutText):
         """
@@ -129,22 +186,127 @@ class Layout:
         elif layoutChar in  ['1', '2', '3', '4']:
             self.agentPositions.append( (int(layoutChar), (x,y)))
             self.numGhosts += 1
-def getLayout(name, back = 2):
-    if name.endswith('.lay'):
-        layout = tryToLoad('layouts/' + name)
-        if layout == None: layout = tryToLoad(name)
-    else:
-        layout = tryToLoad('layouts/' + name + '.lay')
-        if layout == None: layout = tryToLoad(name + '.lay')
-    if layout == None and back >= 0:
-        curdir = os.path.abspath('.')
-        os.chdir('..')
-        layout = getLayout(name, back -1)
-        os.chdir(curdir)
+
+# Compiled layout file: a header, the wall and food grids as bitsets, the
+# capsule and agent positions, the distance to the nearest wall in every
+# direction from every cell (enough to rebuild the visibility matrix) and
+# finally the layout text itself.
+LAYOUT_MAGIC = b'PLAY'
+LAYOUT_VERSION = 1
+LAYOUT_HEADER = struct.Struct('<4sHHHHHHI')
+
+def _packGrid(grid):
+    bits = 0
+    for x in range(grid.width):
+        for y in range(grid.height):
+            if grid[x][y]:
+                bits |= 1 << (x * grid.height + y)
+    return bits.to_bytes((grid.width * grid.height + 7) // 8, 'little')
+
+# The eight cells stored in each possible byte of a packed grid, one byte per cell.
+_BYTE_CELLS = [bytes(byte >> bit & 1 for bit in range(8)) for byte in range(256)]
+
+def _unpackGrid(width, height, data):
+    grid = Grid(width, height, False)
+    grid.data[:] = b''.join(map(_BYTE_CELLS.__getitem__, data))[:width * height]
+    return grid
+
+def compileLayout(layout):
+    "Serializes a Layout into the compiled layout format."
+    text = '\n'.join(layout.layoutText).encode()
+    parts = [LAYOUT_HEADER.pack(LAYOUT_MAGIC, LAYOUT_VERSION, layout.width, layout.height, layout.numGhosts,
+                                len(layout.capsules), len(layout.agentPositions), len(text)),
+             _packGrid(layout.walls), _packGrid(layout.food)]
+    for x, y in layout.capsules:
+        parts.append(struct.pack('<HH', x, y))
+    for isPacman, (x, y) in layout.agentPositions:
+        parts.append(struct.pack('<BHH', isPacman, x, y))
+    parts.append(layout.getWallDistances().tobytes())
+    parts.append(text)
+    return b''.join(parts)
+
+def loadCompiledLayout(buffer):
+    """
+    Rebuilds a Layout from the compiled layout format without parsing the
+    text.  Raises ValueError if buffer is not a compiled layout.
+    """
+    if len(buffer) < LAYOUT_HEADER.size:
+        raise ValueError('truncated compiled layout')
+    magic, version, width, height, numGhosts, numCapsules, numAgents, textLength = \
+        LAYOUT_HEADER.unpack_from(buffer, 0)
+    if magic != LAYOUT_MAGIC or version != LAYOUT_VERSION:
+        raise ValueError('not a compiled layout')
+    gridBytes = (width * height + 7) // 8
+    distanceBytes = 8 * width * height
+    offset = LAYOUT_HEADER.size
+    foodOffset = offset + gridBytes
+    if len(buffer) != offset + 2 * gridBytes + 4 * numCapsules + 5 * numAgents + distanceBytes + textLength:
+        raise ValueError('truncated compiled layout')
+
+    layout = Layout.__new__(Layout)
+    layout.width, layout.height, layout.numGhosts = width, height, numGhosts
+    layout.walls = _unpackGrid(width, height, buffer[offset:offset + gridBytes])
+    offset += gridBytes
+    layout.food = _unpackGrid(width, height, buffer[offset:offset + gridBytes])
+    offset += gridBytes
+    layout.capsules = [struct.unpack_from('<HH', buffer, offset + 4 * i) for i in range(numCapsules)]
+    offset += 4 * numCapsules
+    layout.agentPositions = []
+    for i in range(numAgents):
+        isPacman, x, y = struct.unpack_from('<BHH', buffer, offset + 5 * i)
+        layout.agentPositions.append((isPacman == 1, (x, y)))
+    offset += 5 * numAgents
+    layout.wallDistances = array.array('H')
+    layout.wallDistances.frombytes(buffer[offset:offset + distanceBytes])
+    offset += distanceBytes
+    layout.layoutText = bytes(buffer[offset:offset + textLength]).decode().split('\n')
+    layout.totalFood = bin(int.from_bytes(buffer[foodOffset:foodOffset + gridBytes], 'little')).count('1')
+    layout.cacheKey = None
     return layout
 
+def getLayout(name, back = 2):
+    """
+    Loads a layout by name from layouts/ or the current directory, looking up
+    to back + 1 parent directories.
+    """
+    fileName = name if name.endswith('.lay') else name + '.lay'
+    for depth in range(max(back, -1) + 2):
+        directory = os.path.join(*(['..'] * depth)) if depth else ''
+        for path in (os.path.join(directory, 'layouts', fileName), os.path.join(directory, fileName)):
+            layout = tryToLoad(path)
+            if layout != None: return layout
+    return None
+
 def tryToLoad(fullname):
+    """
+    Loads a layout file, or returns None if there is none.  Each distinct file
+    is only parsed once: compiled layouts are kept in memory and in a binary
+    file under LAYOUT_CACHE_DIR, keyed by a hash of the file's contents, which
+    later runs memory-map instead of parsing the text.  The compiled files
+    live there rather than beside the .lay files so that the checked-in
+    layouts/ directories stay clean and read-only checkouts still get a cache.
+    """
     if(not os.path.exists(fullname)): return None
-    f = open(fullname)
-    try: return Layout([line.strip() for line in f])
-    finally: f.close()
+    with open(fullname, 'rb') as f:
+        contents = f.read()
+    key = hashlib.sha1(contents).hexdigest()
+    if key not in _compiledLayouts:
+        _compiledLayouts[key] = _loadOrCompile(key, contents)
+    return _compiledLayouts[key].deepCopy()
+
+def _loadOrCompile(key, contents):
+    path = os.path.join(LAYOUT_CACHE_DIR, key + '.bin')
+    layoutText = [line.strip() for line in contents.decode().splitlines()]
+    try:
+        with open(path, 'rb') as f:
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as buffer:
+                layout = loadCompiledLayout(buffer)
+        # The hash only names the file; its stored text has to match as well.
+        if layout.layoutText == layoutText:
+            return layout
+    except (OSError, ValueError, struct.error):
+        pass
+
+    layout = Layout(layoutText)
+    util.writeCacheFile(path, compileLayout(layout))
+    return layout
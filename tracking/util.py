@@ -223,6 +223,97 @@ class PriorityQueueWithFunction(PriorityQueue):
         PriorityQueue.push(self, item, self.priorityFunction(item))
 
 
+class IndexedPriorityQueue:
+    """
+      A binary heap that also remembers where every item sits in it, so
+      update can lower an item's priority in O(log n) instead of scanning
+      the whole heap the way PriorityQueue.update does.  Items must be
+      hashable and each item is stored at most once.  Ties are broken in
+      the order items were first pushed, just like PriorityQueue.
+    """
+    def  __init__(self):
+        self.heap = []
+        self.position = {}
+        self.count = 0
+
+    def push(self, item, priority):
+        "Adds item to the queue.  Pushing an item that is already queued re-prioritizes it."
+        if item in self.position:
+            index = self.position[item]
+            (_, c, _) = self.heap[index]
+            self.heap[index] = (priority, c, item)
+            self._siftUp(index)
+            self._siftDown(self.position[item])
+            return
+        self.heap.append((priority, self.count, item))
+        self.position[item] = len(self.heap) - 1
+        self.count += 1
+        self._siftUp(len(self.heap) - 1)
+
+    def pop(self):
+        (_, _, item) = self.heap[0]
+        last = self.heap.pop()
+        del self.position[item]
+        if self.heap:
+            self.heap[0] = last
+            self.position[last[2]] = 0
+            self._siftDown(0)
+        return item
+
+    def isEmpty(self):
+        return len(self.heap) == 0
+
+    def __contains__(self, item):
+        return item in self.position
+
+    def __len__(self):
+        return len(self.heap)
+
+    def update(self, item, priority):
+        # Same contract as PriorityQueue.update: lower the priority of a queued
+        # item, leave it alone if it is already queued at an equal or lower
+        # priority, and push it if it is not queued at all.
+        index = self.position.get(item)
+        if index is None:
+            self.push(item, priority)
+            return
+        (p, c, _) = self.heap[index]
+        if p <= priority:
+            return
+        self.heap[index] = (priority, c, item)
+        self._siftUp(index)
+
+    def _siftUp(self, index):
+        heap, position = self.heap, self.position
+        entry = heap[index]
+        while index > 0:
+            parent = (index - 1) >> 1
+            if heap[parent] <= entry:
+                break
+            heap[index] = heap[parent]
+            position[heap[index][2]] = index
+            index = parent
+        heap[index] = entry
+        position[entry[2]] = index
+
+    def _siftDown(self, index):
+        heap, position = self.heap, self.position
+        size = len(heap)
+        entry = heap[index]
+        while True:
+            child = 2 * index + 1
+            if child >= size:
+                break
+            if child + 1 < size and heap[child + 1] < heap[child]:
+                child += 1
+            if entry <= heap[child]:
+                break
+            heap[index] = heap[child]
+            position[heap[index][2]] = index
+            index = child
+        heap[index] = entry
+        position[entry[2]] = index
+
 def manhattanDistance( xy1, xy2 ):
     "Returns the Manhattan distance between points xy1 and xy2"
     return abs( xy1[0] - xy2[0] ) + abs( xy1[1] - xy2[1] )
@@ -599,6 +690,35 @@ def pause():
     input()
 
 
+# Disk caches under the temp dir.  They are only an optimization: a cache
+# file that is missing or cannot be written just means rebuilding what it
+# would have held.
+#
+import os
+import tempfile
+
+
+def getCacheDirectory(name):
+    "Path of the cache directory called name under the temp dir."
+    return os.path.join(tempfile.gettempdir(), name)
+
+
+def writeCacheFile(path, data):
+    """
+    Writes the bytes data to path, creating its directory.  The data goes to
+    a temporary file that is then renamed into place, so readers never see a
+    partial file.  If anything fails the file is just not written.
+    """
+    try:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmpPath = '%s.%d.tmp' % (path, os.getpid())
+        with open(tmpPath, 'wb') as f:
+            f.write(data)
+        os.replace(tmpPath, path)
+    except OSError:
+        pass
+
+
 # code to handle timeouts
 #
 # FIXME